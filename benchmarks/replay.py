@@ -0,0 +1,172 @@
+# Воспроизведение записи трафика шлюза (CAPTURE_FILE) против локальных заглушек:
+#   python benchmarks/replay.py capture.jsonl                 # в исходном темпе
+#   python benchmarks/replay.py capture.jsonl --speed 4       # в 4 раза быстрее
+#   python benchmarks/replay.py capture.jsonl --gateway-url http://127.0.0.1:8000/api
+# Тела запросов в записи не хранятся: они строятся заново по маршруту и размеру из записи
+import argparse
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+import aiohttp
+
+from run import RouteResult, add_gateway_arguments, format_header, format_row, make_report, make_token, \
+    read_status_kb, running_gateway, save_report
+from stubs import add_stub_arguments
+
+JSON_BODIES: Dict[tuple, Callable[[dict], dict]] = {
+    ("POST", "/auth"): lambda record: {"username": f"user-{record.get('client') or 'anonymous'}", "password": "123456"},
+    ("POST", "/refresh_token"): lambda record: {"refresh_token": f"refresh-{record.get('client') or 'anonymous'}"},
+    ("POST", "/community"): lambda record: {"name": "replayed", "description": "replayed community"},
+    ("POST", "/community/{community_id}/roles"): lambda record: {"name": "replayed", "permissions": [1]},
+    ("POST", "/community/{community_id}/roles/revoke"): lambda record: {"targetUserId": 1, "roleId": 1},
+    ("POST", "/community/{community_id}/roles/assign"): lambda record: {"targetUserId": 1, "roleId": 1},
+    ("POST", "/community-location"): lambda record: {"locationType": "CITY", "locationId": 1, "communityId": 1},
+    ("POST", "/community/{community_id}/events"): lambda record: {
+        "name": "replayed", "description": "replayed event", "eventDate": "2025-01-01T00:00:00",
+    },
+    ("POST", "/batch"): lambda record: {"requests": [batch_item(record, item) for item in record.get("items", [])]},
+}
+
+
+def batch_item(record: dict, item: dict) -> dict:
+    # Вложенный запрос собирается по форме из записи: тот же маршрут, путь и параметры
+    path = item["path"]
+    if item.get("query"):
+        path += "?" + urlencode(item["query"])
+    rebuilt = {"method": item["method"], "path": path}
+    factory = JSON_BODIES.get((item["method"], item["route"]))
+    if factory is not None:
+        rebuilt["body"] = factory(dict(item, client=record.get("client")))
+    return rebuilt
+
+
+def load_capture(path: str, limit: Optional[int]) -> List[dict]:
+    records = []
+    with open(path, "rb") as capture_file:
+        for line in capture_file:
+            if line.strip():
+                records.append(json.loads(line))
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+def request_body(record: dict) -> dict:
+    method, route = record["method"], record["route"]
+    content_type = record.get("content_type", "")
+    body_bytes = record.get("body_bytes", 0)
+
+    if content_type == "multipart/form-data":
+        # Размер фото берется из записи, чтобы нагрузка на загрузку совпадала с исходной
+        form = aiohttp.FormData()
+        form.add_field("first_name", "Replayed")
+        if body_bytes > 512:
+            form.add_field("photo", bytes(body_bytes - 512), filename="photo.jpg", content_type="image/jpeg")
+        return {"data": form}
+
+    factory = JSON_BODIES.get((method, route))
+    if factory is not None:
+        return {"json": factory(record)}
+    if body_bytes:
+        return {"data": bytes(body_bytes), "headers": {"Content-Type": content_type or "application/octet-stream"}}
+    return {}
+
+
+async def replay(args: argparse.Namespace, base_url: str, gateway_pid: Optional[int]) -> Dict[str, dict]:
+    records = load_capture(args.capture, args.limit)
+    if not records:
+        raise SystemExit("Запись пуста")
+
+    # Каждый обезличенный клиент из записи получает собственного пользователя
+    tokens: Dict[str, str] = {}
+    results: Dict[str, RouteResult] = {}
+    mismatched: Dict[str, int] = {}
+    max_lag = 0.0
+    semaphore = asyncio.Semaphore(args.max_in_flight)
+
+    async def send(session: aiohttp.ClientSession, record: dict):
+        name = f"{record['method']} {record['route']}"
+        result = results.setdefault(name, RouteResult())
+        kwargs = request_body(record)
+        headers = kwargs.pop("headers", {})
+        client = record.get("client")
+        if client is not None:
+            if client not in tokens:
+                tokens[client] = make_token(len(tokens) + 1)
+            headers["Authorization"] = f"Bearer {tokens[client]}"
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with session.request(record["method"], base_url + record["path"], params=record.get("query"),
+                                           headers=headers, **kwargs) as response:
+                    await response.read()
+                    status = response.status
+            except aiohttp.ClientError:
+                result.failures += 1
+                return
+            result.add(status, time.perf_counter() - started)
+        if status != record.get("status"):
+            mismatched[name] = mismatched.get(name, 0) + 1
+
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        first_ts = records[0]["ts"]
+        started = time.perf_counter()
+        tasks = []
+        for record in records:
+            delay = (record["ts"] - first_ts) / args.speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Отставание от расписания: клиент воспроизведения не успевает за записью
+                max_lag = max(max_lag, -delay)
+            tasks.append(asyncio.create_task(send(session, record)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    rss_kb = read_status_kb(gateway_pid, "VmRSS") if gateway_pid else 0
+    report = {}
+    width = max(len(name) for name in results) + 2
+    print(format_header(width) + f"{'mismatch':>10}")
+    for name, result in sorted(results.items()):
+        result.elapsed = elapsed
+        result.rss_kb = rss_kb
+        report[name] = {**result.summary(), "status_mismatch": mismatched.get(name, 0)}
+        print(format_row(name, report[name], width) + f"{report[name]['status_mismatch']:>10}")
+    print(f"replayed {len(records)} requests in {elapsed:.1f} s, max schedule lag {max_lag * 1000:.1f} ms")
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Воспроизведение записанного трафика шлюза")
+    parser.add_argument("capture", help="JSONL-файл, записанный шлюзом (CAPTURE_FILE)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Множитель темпа: 1 — исходный, 2 — вдвое быстрее")
+    parser.add_argument("--limit", type=int, help="Воспроизвести только первые N запросов")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Предел одновременных запросов клиента")
+    parser.add_argument("--gateway-url", help="Уже запущенный шлюз; без него поднимаются заглушки и шлюз")
+    add_stub_arguments(parser)
+    add_gateway_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed должен быть больше нуля")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.gateway_url:
+        routes = asyncio.run(replay(args, args.gateway_url.rstrip("/"), None))
+        report = make_report(args, routes, None)
+    else:
+        with running_gateway(args) as gateway:
+            routes = asyncio.run(replay(args, f"http://127.0.0.1:{args.port}", gateway.pid))
+            report = make_report(args, routes, gateway.pid)
+    save_report(args, report)
+
+
+if __name__ == "__main__":
+    main()
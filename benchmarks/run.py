@@ -0,0 +1,347 @@
+# Запуск из корня репозитория, без сети и внешних сервисов:
+#   python benchmarks/run.py --output before.json
+#   python benchmarks/run.py --compare before.json
+# Шлюз поднимается отдельным процессом uvicorn, чтобы пиковый RSS относился только к нему
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+import aiohttp
+from jose import jwt
+
+from stubs import AUTH_PORT, COMMUNITY_PORT, PA_PORT, add_stub_arguments
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+SRC = os.path.join(ROOT, "src")
+
+JWT_SECRET = "benchmark-secret"
+JWT_ALGORITHM = "HS256"
+
+# Запрос сценария: (метод, путь, именованные аргументы aiohttp)
+RequestSpec = tuple
+
+
+@dataclass
+class RouteResult:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    failures: int = 0
+    elapsed: float = 0.0
+    rss_kb: int = 0
+
+    def add(self, status: int, latency: float):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        errors = self.failures + sum(count for status, count in self.statuses.items() if status >= 400)
+        return {
+            "requests": len(latencies) + self.failures,
+            "errors": errors,
+            "rps": round(len(latencies) / self.elapsed, 1) if self.elapsed else 0.0,
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "rss_mb": round(self.rss_kb / 1024, 1),
+        }
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(percentile / 100 * len(values))) - 1))
+    return values[index]
+
+
+def make_token(user_id: int) -> str:
+    return jwt.encode({"id": user_id, "exp": int(time.time()) + 24 * 3600}, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def scenarios(args: argparse.Namespace) -> Dict[str, Callable[[int], RequestSpec]]:
+    photo = os.urandom(args.photo_kb * 1024)
+
+    def auth(i: int) -> RequestSpec:
+        return "POST", "/auth", {"json": {"username": f"user{i % args.users}", "password": "123456"}}
+
+    def profile(i: int) -> RequestSpec:
+        return "GET", "/profile", {}
+
+    def community_search(i: int) -> RequestSpec:
+        return "GET", "/community", {"params": {"name": f"community-{i % args.search_keys}"}}
+
+    def community_members(i: int) -> RequestSpec:
+        return "GET", f"/community/{i % args.communities + 1}/members", {}
+
+    def profile_photo(i: int) -> RequestSpec:
+        # FormData одноразовый, поэтому собирается на каждый запрос
+        form = aiohttp.FormData()
+        form.add_field("first_name", f"Name{i}")
+        form.add_field("photo", photo, filename="photo.jpg", content_type="image/jpeg")
+        return "PATCH", "/profile", {"data": form}
+
+    return {
+        "auth": auth,
+        "profile": profile,
+        "community_search": community_search,
+        "community_members": community_members,
+        "profile_photo": profile_photo,
+    }
+
+
+def read_status_kb(pid: int, field_name: str) -> int:
+    # Пиковый (VmHWM) и текущий (VmRSS) резидентный размер процесса шлюза, Linux
+    try:
+        with open(f"/proc/{pid}/status") as status_file:
+            for line in status_file:
+                if line.startswith(field_name + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def git_revision() -> dict:
+    def git(*command) -> str:
+        try:
+            return subprocess.run(["git", *command], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "src"))}
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Процесс завершился с кодом {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Порт {port} не открылся за {timeout} с")
+
+
+def stub_command(args: argparse.Namespace) -> List[str]:
+    return [
+        sys.executable, os.path.join(HERE, "stubs.py"),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--error-status", str(args.error_status),
+        "--items", str(args.items),
+        "--seed", str(args.seed),
+    ]
+
+
+def gateway_env(args: argparse.Namespace) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": SRC,
+        "JWT_SECRET_KEY": JWT_SECRET,
+        "JWT_ALGORITHM": JWT_ALGORITHM,
+        "AUTH_BASE_URL": "127.0.0.1",
+        "AUTH_PORT": str(AUTH_PORT),
+        "PA_BASE_URL": "127.0.0.1",
+        "PA_PORT": str(PA_PORT),
+        "COMMUNITY_BASE_URL": "127.0.0.1",
+        "COMMUNITY_PORT": str(COMMUNITY_PORT),
+        # Один клиент с одним токеном упрется в лимиты раньше, чем в шлюз
+        "RATE_LIMIT_ENABLED": "false",
+    })
+    for item in args.gateway_env:
+        name, _, value = item.partition("=")
+        env[name] = value
+    return env
+
+
+def gateway_command(port: int) -> List[str]:
+    return [
+        sys.executable, "-m", "uvicorn", "api_gateway_app:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--no-access-log", "--log-level", "warning",
+    ]
+
+
+async def drive_route(session: aiohttp.ClientSession, base_url: str, build: Callable[[int], RequestSpec],
+                      tokens: List[str], concurrency: int, duration: float, warmup: float) -> RouteResult:
+    result = RouteResult()
+    counter = 0
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    async def worker(worker_id: int):
+        nonlocal counter
+        headers = {"Authorization": f"Bearer {tokens[worker_id % len(tokens)]}"}
+        while True:
+            counter += 1
+            method, path, kwargs = build(counter)
+            started = time.perf_counter()
+            if started >= stop_at:
+                return
+            try:
+                async with session.request(method, base_url + path, headers=headers, **kwargs) as response:
+                    await response.read()
+                    status = response.status
+            except aiohttp.ClientError:
+                status = None
+            finished = time.perf_counter()
+            if started < measure_from:
+                continue
+            if status is None:
+                result.failures += 1
+            else:
+                result.add(status, finished - started)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    result.elapsed = duration
+    return result
+
+
+async def run_load(args: argparse.Namespace, gateway_pid: int) -> Dict[str, dict]:
+    base_url = f"http://127.0.0.1:{args.port}"
+    tokens = [make_token(user_id) for user_id in range(1, args.users + 1)]
+    available = scenarios(args)
+    routes = args.routes.split(",") if args.routes else list(available)
+
+    report = {}
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        for name in routes:
+            if name not in available:
+                raise SystemExit(f"Неизвестный маршрут {name}, доступны: {', '.join(available)}")
+            result = await drive_route(session, base_url, available[name], tokens,
+                                       args.concurrency, args.duration, args.warmup)
+            result.rss_kb = read_status_kb(gateway_pid, "VmRSS")
+            report[name] = result.summary()
+            print(format_row(name, report[name]), flush=True)
+    return report
+
+
+def format_header(width: int = 20) -> str:
+    return f"{'route':<{width}}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'rss MB':>9}"
+
+
+def format_row(name: str, row: dict, width: int = 20) -> str:
+    return (f"{name:<{width}}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10}"
+            f"{row['p50_ms']:>10}{row['p99_ms']:>10}{row['rss_mb']:>9}")
+
+
+def print_comparison(report: dict, baseline: dict):
+    width = max([20] + [len(name) + 2 for name in report["routes"]])
+    print(f"\nСравнение с {baseline.get('commit') or 'baseline'}:")
+    print(f"{'route':<{width}}{'rps':>12}{'p50':>12}{'p99':>12}")
+
+    def delta(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    for name, row in report["routes"].items():
+        old = baseline.get("routes", {}).get(name)
+        if old is None:
+            continue
+        print(f"{name:<{width}}{delta(row['rps'], old['rps']):>12}"
+              f"{delta(row['p50_ms'], old['p50_ms']):>12}{delta(row['p99_ms'], old['p99_ms']):>12}")
+    print(f"{'peak rss':<{width}}{delta(report['peak_rss_mb'], baseline.get('peak_rss_mb', 0)):>12}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон шлюза против локальных заглушек сервисов")
+    add_stub_arguments(parser)
+    parser.add_argument("--routes", default="", help="Маршруты через запятую (по умолчанию все)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность замера на маршрут, с")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Прогрев перед замером, с")
+    parser.add_argument("--concurrency", type=int, default=32, help="Одновременных клиентов на маршрут")
+    parser.add_argument("--users", type=int, default=100, help="Число разных пользователей (токенов)")
+    parser.add_argument("--communities", type=int, default=100, help="Число разных сообществ для members")
+    parser.add_argument("--search-keys", type=int, default=20, help="Число разных поисковых запросов")
+    parser.add_argument("--photo-kb", type=int, default=256, help="Размер фото в PATCH /profile, КБ")
+    add_gateway_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_gateway_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--request-timeout", type=float, default=30.0, help="Таймаут одного запроса, с")
+    parser.add_argument("--port", type=int, default=18100, help="Порт шлюза")
+    parser.add_argument("--gateway-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Дополнительная переменная окружения шлюза (можно повторять)")
+    parser.add_argument("--output", help="Файл для JSON-отчета")
+    parser.add_argument("--compare", help="JSON-отчет прошлого прогона для сравнения")
+
+
+@contextmanager
+def running_gateway(args: argparse.Namespace) -> Iterator[subprocess.Popen]:
+    log = tempfile.NamedTemporaryFile(prefix="gateway-bench-", suffix=".log", delete=False)
+    stubs = subprocess.Popen(stub_command(args), stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    gateway = None
+    try:
+        for port in (AUTH_PORT, PA_PORT, COMMUNITY_PORT):
+            wait_for_port(port, stubs)
+        gateway = subprocess.Popen(gateway_command(args.port), cwd=SRC, env=gateway_env(args),
+                                   stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_for_port(args.port, gateway)
+        except RuntimeError:
+            with open(log.name) as gateway_log:
+                sys.stderr.write(gateway_log.read())
+            raise
+        yield gateway
+    finally:
+        for process in (gateway, stubs):
+            if process is not None:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        log.close()
+        os.unlink(log.name)
+
+
+def make_report(args: argparse.Namespace, routes: Dict[str, dict], gateway_pid: Optional[int]) -> dict:
+    report = {
+        **git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": {name: value for name, value in vars(args).items() if name not in ("output", "compare")},
+        "routes": routes,
+        "peak_rss_mb": round(read_status_kb(gateway_pid, "VmHWM") / 1024, 1) if gateway_pid else 0.0,
+    }
+    print(f"peak rss: {report['peak_rss_mb']} MB")
+    return report
+
+
+def save_report(args: argparse.Namespace, report: dict):
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            print_comparison(report, json.load(baseline))
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    with running_gateway(args) as gateway:
+        print(format_header(), flush=True)
+        routes = asyncio.run(run_load(args, gateway.pid))
+        report = make_report(args, routes, gateway.pid)
+    save_report(args, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+
+from aiohttp import web
+
+AUTH_PORT = 18101
+PA_PORT = 18102
+COMMUNITY_PORT = 18103
+
+# Сообщества с ID от этого значения "не существуют": у них нет местоположения и событий
+MISSING_FROM_ID = 1_000_000
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    items: int = 50
+    seed: int = 0
+
+
+class StubServices:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+
+    async def _delay(self):
+        latency = self.config.latency_ms + self.random.uniform(-1, 1) * self.config.jitter_ms
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+    async def _respond(self, payload, status: int = 200) -> web.Response:
+        await self._delay()
+        if self.config.error_rate > 0 and self.random.random() < self.config.error_rate:
+            return web.json_response({"message": "stub error"}, status=self.config.error_status)
+        return web.json_response(payload, status=status)
+
+    def _community(self, community_id: int, creator_id: int = 1) -> dict:
+        return {
+            "id": community_id,
+            "name": f"community-{community_id}",
+            "description": "stub community " * 4,
+            "creatorId": creator_id,
+        }
+
+    # --- auth ---
+    async def auth(self, request: web.Request):
+        data = await request.json()
+        subject = data.get("username") or data.get("refresh_token", "")
+        return await self._respond({"access_token": f"access-{subject}", "refresh_token": f"refresh-{subject}"})
+
+    # --- personal account ---
+    async def get_profile(self, request: web.Request):
+        user_id = int(request.query.get("userID", 1))
+        return await self._respond({
+            "id": user_id, "username": f"user{user_id}", "firstName": "Stub", "photoUrl": None,
+        })
+
+    async def patch_profile(self, request: web.Request):
+        size = 0
+        fields = {}
+        reader = await request.multipart()
+        async for part in reader:
+            if part.filename is not None:
+                while chunk := await part.read_chunk():
+                    size += len(chunk)
+            else:
+                fields[part.name] = await part.text()
+        user_id = int(fields.get("userID", 1))
+        return await self._respond({
+            "id": user_id,
+            "username": fields.get("username", f"user{user_id}"),
+            "firstName": fields.get("firstName"),
+            "photoUrl": f"/photos/{user_id}?size={size}" if size else None,
+        })
+
+    # --- community ---
+    async def search_community(self, request: web.Request):
+        creator_id = int(request.query.get("creatorId", 1))
+        return await self._respond([self._community(i, creator_id) for i in range(self.config.items)])
+
+    async def create_community(self, request: web.Request):
+        data = await request.json()
+        community = self._community(self.random.randint(1, MISSING_FROM_ID - 1), data.get("creatorId", 1))
+        community.update(name=data.get("name"), description=data.get("description"))
+        return await self._respond(community)
+
+    async def get_location(self, request: web.Request):
+        community_id = int(request.match_info["community_id"])
+        if community_id >= MISSING_FROM_ID:
+            await self._delay()
+            return web.Response(status=404)
+        return await self._respond({
+            "id": community_id, "locationType": "CITY", "locationId": community_id % 100, "communityId": community_id,
+        })
+
+    async def create_location(self, request: web.Request):
+        return await self._respond({"id": 1, "locationType": "CITY", "locationId": 1, "communityId": 1})
+
+    async def get_events(self, request: web.Request):
+        community_id = int(request.match_info["community_id"])
+        if community_id >= MISSING_FROM_ID:
+            await self._delay()
+            return web.Response(status=404)
+        return await self._respond([
+            {"id": i, "locationType": "EVENT", "locationId": i, "communityId": community_id}
+            for i in range(self.config.items)
+        ])
+
+    async def create_event(self, request: web.Request):
+        return await self._respond({"id": self.random.randint(1, 10 ** 6)})
+
+    async def get_members(self, request: web.Request):
+        return await self._respond([{"userId": i, "role": "MEMBER"} for i in range(self.config.items)])
+
+    async def get_permissions(self, request: web.Request):
+        return await self._respond([{"id": i, "type": f"PERMISSION_{i}"} for i in range(10)])
+
+    async def create_role(self, request: web.Request):
+        community_id = int(request.match_info["community_id"])
+        return await self._respond({
+            "id": 1, "name": "role",
+            "community": {**self._community(community_id), "createdAt": "2025-01-01T00:00:00", "deletedAt": None},
+            "permissions": [{"id": 1, "type": "PERMISSION_1"}],
+        })
+
+    async def no_content(self, request: web.Request):
+        await self._delay()
+        return web.Response(status=204)
+
+    async def health(self, request: web.Request):
+        return web.Response(text="ok")
+
+    def applications(self) -> dict:
+        auth = web.Application()
+        auth.add_routes([
+            web.post("/auth", self.auth),
+            web.post("/refresh_token", self.auth),
+            web.get("/health", self.health),
+        ])
+
+        personal_account = web.Application(client_max_size=64 * 1024 * 1024)
+        personal_account.add_routes([
+            web.get("/profile", self.get_profile),
+            web.patch("/profile", self.patch_profile),
+            web.get("/health", self.health),
+        ])
+
+        community = web.Application()
+        community.add_routes([
+            web.get("/community", self.search_community),
+            web.post("/community", self.create_community),
+            web.post("/community/{community_id}/roles", self.create_role),
+            web.post("/community/{community_id}/roles/revoke", self.no_content),
+            web.post("/community/{community_id}/roles/assign", self.no_content),
+            web.delete("/community/{community_id}/roles/{role_id}", self.no_content),
+            web.get("/community-location/{community_id}", self.get_location),
+            web.post("/community-location", self.create_location),
+            web.get("/community/{community_id}/events", self.get_events),
+            web.post("/community/{community_id}/events", self.create_event),
+            web.delete("/community/{community_id}/events/{event_id}", self.no_content),
+            web.get("/community/{community_id}/members", self.get_members),
+            web.get("/permission", self.get_permissions),
+            web.get("/health", self.health),
+        ])
+
+        return {AUTH_PORT: auth, PA_PORT: personal_account, COMMUNITY_PORT: community}
+
+
+async def start_stubs(config: StubConfig, host: str = "127.0.0.1") -> list:
+    runners = []
+    for port, application in StubServices(config).applications().items():
+        runner = web.AppRunner(application, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        runners.append(runner)
+    return runners
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Средняя задержка ответа заглушки")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Разброс задержки (+-)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой (0..1)")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP-статус ошибочных ответов")
+    parser.add_argument("--items", type=int, default=50, help="Число элементов в списочных ответах")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора случайных чисел")
+
+
+def stub_config(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        items=args.items,
+        seed=args.seed,
+    )
+
+
+async def serve_forever(config: StubConfig):
+    runners = await start_stubs(config)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушки сервисов auth, personal account и community")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_forever(stub_config(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,21 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from starlette.middleware import Middleware
 from fastapi.middleware.cors import CORSMiddleware
 from auth.controller import auth_router
+from batch.controller import batch_router
 from personal_account.controller import pa_router
 from community.controller import c_router
+from monitoring.controller import monitoring_router, profiler_router
+from core.capture import CaptureWriter
+from core.json_codec import FastJSONResponse
+from core.middleware import CaptureMiddleware, MetricsMiddleware, ProfilerMiddleware, ServerTimingMiddleware, \
+    timing_logger
+from core.proxy import ProxyEngine
+from core.settings import settings
+from core.upstream import UpstreamClients
 
 middleware = [
     Middleware(
@@ -15,6 +27,31 @@ middleware = [
     )
 ]
 
+capture_writer = CaptureWriter(
+    settings.capture_settings.file,
+    batch_size=settings.capture_settings.batch_size,
+    flush_interval=settings.capture_settings.flush_interval,
+    max_pending=settings.capture_settings.max_pending,
+) if settings.capture_settings.file else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    upstreams = UpstreamClients(settings.upstream_pool_settings)
+    await upstreams.start()
+    upstreams.register_metrics()
+    app.state.upstreams = upstreams
+    app.state.proxy = ProxyEngine(upstreams)
+    if capture_writer is not None:
+        capture_writer.start()
+    try:
+        yield
+    finally:
+        if capture_writer is not None:
+            await capture_writer.close()
+        await upstreams.close()
+
+
 app = FastAPI(
     title="API Gateway",
     description="API Gateway",
@@ -22,9 +59,38 @@ app = FastAPI(
     docs_url="/docs",
     root_path="/api",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 app.include_router(auth_router)
 app.include_router(pa_router)
 app.include_router(c_router)
+app.include_router(batch_router)
+
+if settings.metrics_settings.enabled:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(monitoring_router)
+
+if settings.server_timing_settings.enabled or settings.server_timing_settings.log_sample_rate > 0:
+    if settings.server_timing_settings.log_sample_rate > 0 and not timing_logger.handlers:
+        timing_logger.addHandler(logging.StreamHandler())
+        timing_logger.setLevel(logging.INFO)
+    app.add_middleware(
+        ServerTimingMiddleware,
+        header=settings.server_timing_settings.enabled,
+        log_sample_rate=settings.server_timing_settings.log_sample_rate,
+    )
+
+if settings.profiler_settings.token:
+    app.add_middleware(ProfilerMiddleware)
+    app.include_router(profiler_router)
+
+if capture_writer is not None:
+    app.add_middleware(
+        CaptureMiddleware,
+        writer=capture_writer,
+        sample_rate=settings.capture_settings.sample_rate,
+        excluded_routes=[route.path for router in (monitoring_router, profiler_router) for route in router.routes],
+    )
@@ -1,35 +1,45 @@
-import json
+import hashlib
+import time
+from typing import Annotated
 
 from starlette import status
-import aiohttp
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends
+from auth import routes
 from auth.dto import TokensCreateResponseDTO, AuthRequestDTO, AuthRefreshTokenDTO
+from core import json_codec
+from core.capture import collect_upstreams, record_upstream
+from core.metrics import register_cache
+from core.proxy import ProxyEngine
+from core.response_cache import ResponseCache, CachedResponse
 from core.settings import settings
+from core.singleflight import SingleFlight
+from core.timing import collect_timings, record_timings
+from dependency.proxy import get_proxy_engine
+from dependency.rate_limit import limit_by_client_ip
 
 auth_router = APIRouter(
     tags=["Авторизация пользователя"],
+    dependencies=[Depends(limit_by_client_ip("auth"))],
 )
 
+# Параллельные обновления одним refresh_token идут в сервис одним запросом,
+# а полученная пара токенов несколько секунд отдается опоздавшим дублям
+refresh_flight = SingleFlight()
+refresh_results = ResponseCache(
+    ttl=settings.auth_service_settings.refresh_hold_seconds,
+    maxsize=settings.auth_service_settings.refresh_hold_size,
+)
+register_cache("refresh_token", refresh_results)
+
 
 @auth_router.post("/auth",
                   summary="Авторизация пользователя",
                   response_model=TokensCreateResponseDTO,
                   status_code=status.HTTP_201_CREATED
                   )
-async def send_request_to_auth_service(data: AuthRequestDTO):
-    json_data = json.dumps(data.dict(), ensure_ascii=False).encode("utf-8")
-    headers = {"Content-Type": "application/json"}
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url=f"http://{settings.auth_service_settings.base_url}:{settings.auth_service_settings.port}/auth", headers=headers, data=json_data, ssl=False) as response:
-
-            if response.status != 200:
-                raise HTTPException(
-                    detail=f"{response.status}: {response.content}",
-                    status_code=response.status
-                )
-
-            return await response.json()
+async def send_request_to_auth_service(data: AuthRequestDTO,
+                                       proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    return await proxy.call(routes.AUTH, json_body=data.dict())
 
 
 @auth_router.post('/refresh_token',
@@ -37,17 +47,20 @@ async def send_request_to_auth_service(data: AuthRequestDTO):
                   status_code=status.HTTP_200_OK,
                   response_model=TokensCreateResponseDTO
                   )
-async def send_request_to_refresh_token(data: AuthRefreshTokenDTO):
-    json_data = json.dumps(data.dict(), ensure_ascii=False).encode("utf-8")
-
-    async with aiohttp.ClientSession() as session:
-        headers = {"Content-Type": "application/json"}
-        async with session.post(url=f"http://{settings.auth_service_settings.base_url}:{settings.auth_service_settings.port}/refresh_token", headers=headers, data=json_data, ssl=False) as response:
+async def send_request_to_refresh_token(data: AuthRefreshTokenDTO,
+                                        proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    # В памяти хранится только дайджест refresh_token
+    key = hashlib.sha256(data.refresh_token.encode("utf-8")).digest()
 
-            if response.status != 200:
-                raise HTTPException(
-                    detail=f"{response.status}: {response.content}",
-                    status_code=response.status
-                )
+    async def refresh():
+        tokens = await proxy.call(routes.REFRESH_TOKEN, json_body=data.dict())
+        return CachedResponse(body=json_codec.dumps(tokens), status_code=status.HTTP_200_OK)
 
-            return await response.json()
+    joined = time.perf_counter()
+    (cached, timings), upstreams = await refresh_flight.do(
+        key, lambda: collect_upstreams(collect_timings(refresh_results.get_or_fetch(key, refresh)))
+    )
+    for name, upstream_status in upstreams:
+        record_upstream(name, upstream_status)
+    record_timings(timings, since=joined)
+    return json_codec.loads(cached.body)
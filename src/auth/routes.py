@@ -0,0 +1,13 @@
+from core.concurrency import PRIORITY_HIGH
+from core.proxy import ProxyRoute
+
+AUTH = ProxyRoute(
+    "POST", "/auth", "auth",
+    error=(None, None),
+    priority=PRIORITY_HIGH,
+)
+REFRESH_TOKEN = ProxyRoute(
+    "POST", "/refresh_token", "auth",
+    error=(None, None),
+    priority=PRIORITY_HIGH,
+)
@@ -0,0 +1,92 @@
+import asyncio
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette import status
+from starlette.responses import Response
+
+from batch.dto import BatchRequestDTO, BatchResponseDTO, BatchItemRequestDTO
+from core import json_codec
+from core.settings import settings
+from core.subrequest import dispatch, header, is_subrequest, SubResponse
+from dependency.current_user import get_user_from_token
+from dependency.rate_limit import limit_by_user
+
+batch_router = APIRouter(
+    tags=["Пакетные запросы"],
+    dependencies=[Depends(limit_by_user("batch"))],
+)
+
+BATCH_PATH = "/batch"
+ALLOWED_METHODS = frozenset({"GET", "POST", "PATCH", "PUT", "DELETE"})
+
+
+def _item_json(item: BatchItemRequestDTO, response: SubResponse) -> bytes:
+    # JSON-ответ маршрута вкладывается байтами, без повторного разбора
+    if not response.body:
+        body = b"null"
+    elif response.content_type.startswith("application/json"):
+        body = response.body
+    else:
+        body = json_codec.dumps(response.body.decode("utf-8", errors="replace"))
+
+    return (b'{"id":' + json_codec.dumps(item.id) + b',"status":' + str(response.status).encode()
+            + b',"body":' + body + b"}")
+
+
+def _error(item_status: int, detail: str) -> SubResponse:
+    return SubResponse(status=item_status, content_type="application/json",
+                       body=json_codec.dumps({"detail": detail}))
+
+
+@batch_router.post(
+    BATCH_PATH,
+    summary="Выполнить несколько запросов к шлюзу",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResponseDTO
+)
+async def execute_batch_requests(request: Request,
+                                 data: BatchRequestDTO,
+                                 current_user: Annotated[dict, Depends(get_user_from_token)]):
+    # Проверка по пути не ловит все его написания (/api/batch, %-кодирование),
+    # поэтому вложенный пакет узнается по отметке в scope уже после маршрутизации
+    if is_subrequest(request.scope):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Вложенные пакетные запросы не поддерживаются",
+        )
+
+    if len(data.requests) > settings.batch_settings.max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не больше {settings.batch_settings.max_items} запросов в пакете",
+        )
+
+    # Токен уже проверен; вложенные запросы получают его же и попадают в кэш проверенных JWT
+    headers = [(b"authorization", header(request.scope, b"authorization"))]
+    semaphore = asyncio.Semaphore(settings.batch_settings.concurrency)
+
+    async def run(item: BatchItemRequestDTO) -> SubResponse:
+        method = item.method.upper()
+        if method not in ALLOWED_METHODS:
+            return _error(status.HTTP_405_METHOD_NOT_ALLOWED, "Метод не поддерживается")
+        if not item.path.startswith("/") or item.path.split("?", 1)[0].rstrip("/") == BATCH_PATH:
+            return _error(status.HTTP_400_BAD_REQUEST, "Недопустимый путь")
+
+        item_headers = headers
+        body = b""
+        if item.body is not None:
+            item_headers = headers + [(b"content-type", b"application/json")]
+            body = json_codec.dumps(item.body)
+
+        async with semaphore:
+            try:
+                return await dispatch(request.app, request.scope, method, item.path, item_headers, body)
+            except Exception:
+                return _error(status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal Server Error")
+
+    responses: List[SubResponse] = await asyncio.gather(*(run(item) for item in data.requests))
+    content = b'{"responses":[' + b",".join(
+        _item_json(item, response) for item, response in zip(data.requests, responses)
+    ) + b"]}"
+    return Response(content=content, media_type="application/json")
@@ -0,0 +1,42 @@
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BatchItemRequestDTO(BaseModel):
+    id: Optional[str] = Field(
+        None, description="Идентификатор запроса, возвращается в ответе как есть"
+    )
+    method: str = Field(
+        "GET", description="HTTP-метод", examples=["GET"]
+    )
+    path: str = Field(
+        ..., description="Путь маршрута шлюза вместе со строкой запроса", examples=["/community?is_owner=true"]
+    )
+    body: Any = Field(
+        None, description="JSON-тело запроса"
+    )
+
+
+class BatchRequestDTO(BaseModel):
+    requests: List[BatchItemRequestDTO] = Field(
+        ..., min_length=1, description="Список запросов"
+    )
+
+
+class BatchItemResponseDTO(BaseModel):
+    id: Optional[str] = Field(
+        None, description="Идентификатор запроса"
+    )
+    status: int = Field(
+        ..., description="HTTP-статус ответа"
+    )
+    body: Any = Field(
+        None, description="Тело ответа"
+    )
+
+
+class BatchResponseDTO(BaseModel):
+    responses: List[BatchItemResponseDTO] = Field(
+        ..., description="Ответы в порядке запросов"
+    )
@@ -1,19 +1,157 @@
-import json
-import aiohttp
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from starlette import status
+from community import routes
 from community.dto import CommunityResponseDTO, CommunityRequestDTO, CommunityRequestToServiceDTO, \
-    CreateRoleResponseToServiceDTO, CreateRoleRequestDTO, CommunityResponseToServiceDTO, PermissionResponseToServiceDTO, \
-    RevokeAndAssignRoleRequestDTO, CommunityLocationResponseDTO, CommunityEventRequestDTO
+    CreateRoleResponseToServiceDTO, CreateRoleRequestDTO, RevokeAndAssignRoleRequestDTO, CommunityLocationResponseDTO, \
+    CommunityEventRequestDTO, CommunityOverviewResponseDTO, SubRequestErrorDTO, CommunityLocationsResponseDTO
+from core import json_codec
+from core.fanout import gather_partial
+from core.metrics import register_cache
+from core.negative_cache import NegativeCache
+from core.proxy import ProxyEngine, ProxyRoute
+from core.response_cache import ResponseCache, CachedResponse
 from core.settings import settings
+from core.timing import phase, PHASE_DTO
 from dependency.current_user import get_user_from_token
-from typing import Annotated, List
+from dependency.proxy import get_proxy_engine
+from dependency.rate_limit import limit_by_user
+from typing import Annotated, Any, Awaitable, Callable, Hashable, List
 
 
 c_router = APIRouter(
-    tags=["Сообщества"]
+    tags=["Сообщества"],
+    dependencies=[Depends(limit_by_user("community"))],
 )
 
+permission_cache = ResponseCache(
+    ttl=settings.response_cache_settings.permission_ttl,
+    stale_ttl=settings.response_cache_settings.permission_stale_ttl,
+    maxsize=settings.response_cache_settings.maxsize,
+)
+
+# TTL — страховка на случай изменений в обход шлюза; свои записи шлюз инвалидирует сам
+search_cache = ResponseCache(
+    ttl=settings.response_cache_settings.search_ttl,
+    maxsize=settings.response_cache_settings.maxsize,
+)
+
+location_cache = ResponseCache(
+    ttl=settings.response_cache_settings.location_ttl,
+    maxsize=settings.response_cache_settings.maxsize,
+)
+
+# Ключи: ("location", community_id), ("events", community_id)
+not_found_cache = NegativeCache(
+    ttl=settings.response_cache_settings.not_found_ttl,
+    maxsize=settings.response_cache_settings.maxsize,
+)
+
+register_cache("permission", permission_cache)
+register_cache("search", search_cache)
+register_cache("location", location_cache)
+register_cache("not_found", not_found_cache)
+
+
+async def _unless_not_found(key: Hashable, route: ProxyRoute, call: Callable[[], Awaitable[Any]]) -> Any:
+    if key in not_found_cache:
+        raise route.mapped_error(status.HTTP_404_NOT_FOUND, None)
+
+    token = not_found_cache.begin(key)
+    try:
+        return await call()
+    except HTTPException as exc:
+        if exc.status_code == status.HTTP_404_NOT_FOUND:
+            not_found_cache.add(key, token)
+        raise
+    finally:
+        not_found_cache.finish(key, token)
+
+
+def _forget_location(proxy: ProxyEngine, community_id: int):
+    # GET, начатый до записи, может вернуть устаревший ответ (в том числе 404):
+    # новые запросы не присоединяются к нему, а его результат не попадает в кэши
+    proxy.forget(routes.GET_COMMUNITY_LOCATION, path_params={"community_id": community_id})
+    location_cache.invalidate(community_id)
+    not_found_cache.discard(("location", community_id))
+
+
+def _forget_not_found(proxy: ProxyEngine, community_id: int):
+    _forget_location(proxy, community_id)
+    not_found_cache.discard(("events", community_id))
+
+
+async def _get_location(proxy: ProxyEngine, community_id: int,
+                        route: ProxyRoute = routes.GET_COMMUNITY_LOCATION) -> CommunityLocationResponseDTO:
+    return await _unless_not_found(
+        ("location", community_id),
+        route,
+        lambda: _fetch_location(proxy, community_id, route),
+    )
+
+
+async def _fetch_location(proxy: ProxyEngine, community_id: int, route: ProxyRoute) -> CommunityLocationResponseDTO:
+    async def fetch_location():
+        response = await proxy.fetch(route, path_params={"community_id": community_id})
+        return CachedResponse(
+            body=response.body,
+            status_code=response.status,
+            media_type=response.content_type,
+        )
+
+    cached = await location_cache.get_or_fetch(community_id, fetch_location)
+    error = route.mapped_error(cached.status_code, None)
+    if error is None and cached.status_code >= 400:
+        error = HTTPException(status_code=cached.status_code)
+    if error is not None:
+        raise error
+
+    with phase(PHASE_DTO):
+        return routes.to_community_location(json_codec.loads(cached.body))
+
+
+def _search_key(params: dict) -> Hashable:
+    return tuple(sorted(params.items()))
+
+
+def _contains(value: str, text: str) -> bool:
+    return value.lower() in (text or "").lower()
+
+
+def _affected_by(community: CommunityResponseDTO) -> Callable[[Hashable], bool]:
+    # Может ли новое сообщество попасть в результат поиска с этими параметрами
+    def affected(key: Hashable) -> bool:
+        params = dict(key)
+        if "id" in params:
+            return params["id"] == community.id
+        if "creatorId" in params and params["creatorId"] != community.creator_id:
+            return False
+        if "name" in params and not _contains(params["name"], community.name):
+            return False
+        if "description" in params and not _contains(params["description"], community.description):
+            return False
+        return True
+
+    return affected
+
+
+def _parse_ids(ids: str) -> List[int]:
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный список ID")
+
+    # Повторяющиеся ID запрашиваются один раз, порядок первого появления сохраняется
+    unique = list(dict.fromkeys(parsed))
+    if not unique:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Список ID пуст")
+    if len(unique) > settings.bulk_lookup_settings.max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не больше {settings.bulk_lookup_settings.max_ids} ID в запросе",
+        )
+    return unique
+
+
 @c_router.get(
     "/community",
     summary="Поиск сообществ",
@@ -21,15 +159,12 @@ c_router = APIRouter(
     response_model=List[CommunityResponseDTO]
 )
 async def search_community_send_request_to_service(current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                   proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)],
                                                    is_owner: bool = Query(False, description="Флаг для сообществ"),
                                                    community_id: int = Query(None, description="Уникальный идентификатор сообщества"),
                                                    name: str = Query(None, description="Имя сообщества"),
                                                    description: str = Query(None, description="Описание сообщества")):
     user_id = current_user.get("id")
-    url = f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community"
-    headers = {
-        "Content-Type": "application/json",
-    }
     params = {}
 
     if community_id:
@@ -44,26 +179,15 @@ async def search_community_send_request_to_service(current_user: Annotated[dict,
     if is_owner:
         params['creatorId'] = user_id
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            url=url,
-            params=params,
-            headers=headers,
-            ssl=False,
-        ) as response:
-            if response.status != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=response.content,
-                )
-
-            responses = await response.json()
-            return [CommunityResponseDTO(
-                id=response.get("id"),
-                name=response.get("name"),
-                description=response.get("description"),
-                creator_id=response.get("creatorId")
-            ) for response in responses]
+    async def fetch_communities():
+        communities = await proxy.call(routes.SEARCH_COMMUNITY, params=params)
+        return CachedResponse(
+            body=json_codec.dumps([community.model_dump(mode="json") for community in communities]),
+            status_code=status.HTTP_200_OK,
+        )
+
+    cached = await search_cache.get_or_fetch(_search_key(params), fetch_communities)
+    return cached.to_response()
 
 
 @c_router.post(
@@ -73,40 +197,23 @@ async def search_community_send_request_to_service(current_user: Annotated[dict,
     response_model=CommunityResponseDTO
 )
 async def create_community_send_request_to_service(current_user: Annotated[dict, Depends(get_user_from_token)],
-                                                   data: CommunityRequestDTO):
+                                                   data: CommunityRequestDTO,
+                                                   proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
     user_id = current_user.get("id")
 
-    url = f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community"
-    headers = {
-        "Content-Type": "application/json",
-    }
-
     send_data = CommunityRequestToServiceDTO(
         name=data.name,
         description=data.description,
         creatorId=user_id
     ).dict()
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            url=url,
-            data=json.dumps(send_data),
-            headers=headers,
-            ssl=False,
-        ) as response:
-            if response.status != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=response.reason,
-                )
-
-            responses = await response.json()
-            return CommunityResponseDTO(
-                id=responses.get("id"),
-                name=responses.get("name"),
-                description=responses.get("description"),
-                creator_id=responses.get("creatorId")
-            )
+    community = await proxy.call(routes.CREATE_COMMUNITY, json_body=send_data)
+    # Поиск, начатый до создания, не вернет новое сообщество: к нему больше не присоединяемся
+    proxy.forget(routes.SEARCH_COMMUNITY)
+    search_cache.invalidate_matching(_affected_by(community))
+    _forget_not_found(proxy, community.id)
+    return community
+
 
 @c_router.post(
     "/community/{community_id}/roles",
@@ -116,45 +223,14 @@ async def create_community_send_request_to_service(current_user: Annotated[dict,
 )
 async def create_community_role_send_request_to_service(community_id: int,
                                                         current_user: Annotated[dict, Depends(get_user_from_token)],
-                                                        data: CreateRoleRequestDTO):
-    user_id = current_user.get("id")
-
-    url = f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community/{community_id}/roles?userId={user_id}"
-
-    headers = {
-        "Content-Type": "application/json",
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            url=url,
-            headers=headers,
-            data=json.dumps(data.dict()),
-            ssl=False,
-        ) as response:
-
-            if response.status == 403:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="У вас нет прав"
-                )
-            response = await response.json()
-            return CreateRoleResponseToServiceDTO(
-                id=response.get("id"),
-                name=response.get("name"),
-                community=CommunityResponseToServiceDTO(
-                    id=response.get("community").get("id"),
-                    name=response.get("community").get("name"),
-                    creator_id=response.get("community").get("creatorId"),
-                    description=response.get("community").get("description"),
-                    created_at=response.get("community").get("createdAt"),
-                    deleted_at=response.get("community").get("deletedAt"),
-                ),
-                permissions=[PermissionResponseToServiceDTO(
-                    id=permission.get("id"),
-                    type=permission.get("type"),
-                ) for permission in response.get("permissions")]
-            )
+                                                        data: CreateRoleRequestDTO,
+                                                        proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    return await proxy.call(
+        routes.CREATE_ROLE,
+        user_id=current_user.get("id"),
+        path_params={"community_id": community_id},
+        json_body=data.dict(),
+    )
 
 
 @c_router.post(
@@ -164,24 +240,14 @@ async def create_community_role_send_request_to_service(community_id: int,
 )
 async def revoke_role_send_request_to_service(current_user: Annotated[dict, Depends(get_user_from_token)],
                                               community_id: int,
-                                              data: RevokeAndAssignRoleRequestDTO):
-    user_id = current_user.get("id")
-    headers = {
-        "Content-Type": "application/json",
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community/{community_id}/roles/revoke?userId={user_id}",
-            headers=headers,
-            ssl=False,
-            data=json.dumps(data.dict()),
-        ) as response:
-            if response.status == 403 or response.status == 404:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail="Недостаточно прав" if response.status == 403 else "Связь не найдена"
-                )
+                                              data: RevokeAndAssignRoleRequestDTO,
+                                              proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    return await proxy.call(
+        routes.REVOKE_ROLE,
+        user_id=current_user.get("id"),
+        path_params={"community_id": community_id},
+        json_body=data.dict(),
+    )
 
 
 @c_router.post(
@@ -192,30 +258,14 @@ async def revoke_role_send_request_to_service(current_user: Annotated[dict, Depe
 )
 async def assign_role_send_request_to_service(current_user: Annotated[dict, Depends(get_user_from_token)],
                                               community_id: int,
-                                              data: RevokeAndAssignRoleRequestDTO):
-
-    user_id = current_user.get("id")
-    headers = {
-        "Content-Type": "application/json",
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community/{community_id}/roles/assign?userId={user_id}",
-                headers=headers,
-                ssl=False,
-                data=json.dumps(data.dict()),
-        ) as response:
-            if response.status == 403 or response.status == 404:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail="Недостаточно прав" if response.status == 403 else "Связь не найдена"
-                )
-            if response.status == 409:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail="Роль уже назначена пользователю"
-                )
+                                              data: RevokeAndAssignRoleRequestDTO,
+                                              proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    return await proxy.call(
+        routes.ASSIGN_ROLE,
+        user_id=current_user.get("id"),
+        path_params={"community_id": community_id},
+        json_body=data.dict(),
+    )
 
 
 @c_router.delete(
@@ -225,22 +275,13 @@ async def assign_role_send_request_to_service(current_user: Annotated[dict, Depe
 )
 async def delete_role_send_request_to_service(community_id: int,
                                               role_id: int,
-                                              current_user: Annotated[dict, Depends(get_user_from_token)]):
-    user_id = current_user.get("id")
-    headers = {
-        "Content-Type": "application/json",
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.delete(
-            url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community/{community_id}/roles/{role_id}?userId={user_id}",
-            headers=headers,
-            ssl=False,
-        ) as response:
-            if response.status == 403 or response.status == 404:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail="Недостаточно прав" if response.status == 403 else "Роль не найдена"
-                )
+                                              current_user: Annotated[dict, Depends(get_user_from_token)],
+                                              proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    return await proxy.call(
+        routes.DELETE_ROLE,
+        user_id=current_user.get("id"),
+        path_params={"community_id": community_id, "role_id": role_id},
+    )
 
 
 @c_router.post(
@@ -249,32 +290,48 @@ async def delete_role_send_request_to_service(community_id: int,
     summary="Привязать сообщество к местоположению",
     response_model=CommunityLocationResponseDTO
 )
-async def community_location_send_request_to_service(current_user: Annotated[dict, Depends(get_user_from_token)]):
-    user_id = current_user.get("id")
-    headers = {
-        "Content-Type": "application/json",
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community-location",
-            headers=headers,
-            ssl=False,
-        ) as response:
-            if response.status == 400:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail="Ошибка валидации"
-                )
-
-            response = await response.json()
-
-            return CommunityLocationResponseDTO(
-                id=response.get("id"),
-                locationType=response.get("locationType"),
-                locationId=response.get("locationId"),
-                communityId=response.get("communityId"),
-            )
+async def community_location_send_request_to_service(current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                     proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    location = await proxy.call(routes.CREATE_COMMUNITY_LOCATION)
+    _forget_location(proxy, location.communityId)
+    return location
+
+
+@c_router.get(
+    "/community-location",
+    summary="Поиск местоположений нескольких сообществ по ID",
+    status_code=status.HTTP_200_OK,
+    response_model=CommunityLocationsResponseDTO
+)
+async def get_community_locations_send_request_to_service(current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                          proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)],
+                                                          ids: str = Query(..., description="ID сообществ через запятую",
+                                                                           examples=["1,2,3"])):
+    community_ids = _parse_ids(ids)
+
+    # Закэшированные ID отдаются сразу, промахи запрашиваются параллельно с ограничением
+    results, errors = await gather_partial(
+        {community_id: _get_location(proxy, community_id, routes.GET_COMMUNITY_LOCATION_BULK)
+         for community_id in community_ids},
+        limit=settings.bulk_lookup_settings.concurrency,
+    )
+
+    # 404 — не ошибка, а ответ "у сообщества нет местоположения"
+    locations = {}
+    failures = {}
+    for community_id in community_ids:
+        if community_id in results:
+            locations[community_id] = results[community_id]
+            continue
+
+        status_code, detail = errors[community_id]
+        if status_code == status.HTTP_404_NOT_FOUND:
+            locations[community_id] = None
+        else:
+            failures[community_id] = SubRequestErrorDTO(status_code=status_code, detail=detail)
+
+    return CommunityLocationsResponseDTO(locations=locations, errors=failures)
+
 
 @c_router.get(
     "/community-location/{community_id}",
@@ -283,30 +340,10 @@ async def community_location_send_request_to_service(current_user: Annotated[dic
     response_model=CommunityLocationResponseDTO
 )
 async def get_community_location_send_request_to_service(community_id: int,
-                                                         current_user: Annotated[dict, Depends(get_user_from_token)]):
-    user_id = current_user.get("id")
-    headers = {
-        "Content-Type": "application/json",
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community-location/{community_id}",
-            headers=headers,
-            ssl=False,
-        ) as response:
-
-            if response.status == 404:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail="Не найдено по данному ID"
-                )
-            response = await response.json()
-            return CommunityLocationResponseDTO(
-                id=response.get("id"),
-                locationType=response.get("locationType"),
-                locationId=response.get("locationId"),
-                communityId=response.get("communityId"),
-            )
+                                                         current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                         proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    return await _get_location(proxy, community_id)
+
 
 @c_router.get(
     "/community/{community_id}/events",
@@ -315,28 +352,14 @@ async def get_community_location_send_request_to_service(community_id: int,
     response_model=List[CommunityLocationResponseDTO]
 )
 async def get_community_events_send_request_to_service(community_id: int,
-                                                       current_user: Annotated[dict, Depends(get_user_from_token)]):
-    user_id = current_user.get("id")
-
-    headers = {
-        "Content-Type": "application/json",
-    }
+                                                       current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                       proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    return await _unless_not_found(
+        ("events", community_id),
+        routes.GET_COMMUNITY_EVENTS,
+        lambda: proxy.call(routes.GET_COMMUNITY_EVENTS, path_params={"community_id": community_id}),
+    )
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community/{community_id}/events",
-            headers=headers,
-            ssl=False,
-        ) as response:
-            if response.status == 404:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail="Not found"
-                )
-
-            response = await response.json()
-
-            return response
 
 @c_router.post(
     "/community/{community_id}/events",
@@ -345,33 +368,16 @@ async def get_community_events_send_request_to_service(community_id: int,
 )
 async def post_community_events_send_request_to_service(community_id: int,
                                                        data: CommunityEventRequestDTO,
-                                                       current_user: Annotated[dict, Depends(get_user_from_token)]):
-    user_id = current_user.get("id")
-
-    headers = {
-        "Content-Type": "application/json",
-    }
-    params = {}
-
-    params["userId"] = user_id
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community/{community_id}/events",
-            headers=headers,
-            data=data.model_dump_json(),
-            params=params,
-            ssl=False,
-        ) as response:
-            if response.status == 403:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail="Недостаточно прав"
-                )
-
-            response = await response.json()
-
-            return response
+                                                       current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                       proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    response = await proxy.call(
+        routes.CREATE_COMMUNITY_EVENT,
+        user_id=current_user.get("id"),
+        path_params={"community_id": community_id},
+        json_body=data.model_dump(mode="json"),
+    )
+    not_found_cache.discard(("events", community_id))
+    return response
 
 
 @c_router.delete(
@@ -381,28 +387,13 @@ async def post_community_events_send_request_to_service(community_id: int,
 )
 async def delete_community_events_send_request_to_service(community_id: int,
                                                           event_id: int,
-                                                       current_user: Annotated[dict, Depends(get_user_from_token)]):
-    user_id = current_user.get("id")
-
-    headers = {
-        "Content-Type": "application/json",
-    }
-    params = {}
-
-    params["userId"] = user_id
-
-    async with aiohttp.ClientSession() as session:
-        async with session.delete(
-            url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community/{community_id}/events/{event_id}",
-            headers=headers,
-            params=params,
-            ssl=False,
-        ) as response:
-            if response.status == 403:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail="Недостаточно прав"
-                )
+                                                       current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                       proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    return await proxy.call(
+        routes.DELETE_COMMUNITY_EVENT,
+        user_id=current_user.get("id"),
+        path_params={"community_id": community_id, "event_id": event_id},
+    )
 
 
 @c_router.get(
@@ -410,22 +401,18 @@ async def delete_community_events_send_request_to_service(community_id: int,
     summary="Список прав",
     status_code=status.HTTP_200_OK,
 )
-async def get_permission_events_send_request_to_service(current_user: Annotated[dict, Depends(get_user_from_token)]):
-    user_id = current_user.get("id")
-
-    headers = {
-        "Content-Type": "application/json",
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/permission",
-            headers=headers,
-            ssl=False,
-        ) as response:
-            response = await response.json()
+async def get_permission_events_send_request_to_service(current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                        proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    async def fetch_permissions():
+        response = await proxy.fetch(routes.GET_PERMISSIONS)
+        return CachedResponse(
+            body=response.body,
+            status_code=response.status,
+            media_type=response.content_type,
+        )
 
-            return response
+    cached = await permission_cache.get_or_fetch("/permission", fetch_permissions)
+    return cached.to_response()
 
 
 @c_router.get(
@@ -433,19 +420,46 @@ async def get_permission_events_send_request_to_service(current_user: Annotated[
     summary="Список прав",
     status_code=status.HTTP_200_OK,
 )
-async def get_members_send_request_to_service(community_id: int, current_user: Annotated[dict, Depends(get_user_from_token)]):
-    user_id = current_user.get("id")
+async def get_members_send_request_to_service(community_id: int, current_user: Annotated[dict, Depends(get_user_from_token)],
+                                              proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    return await proxy.call(routes.GET_MEMBERS, path_params={"community_id": community_id})
+
 
-    headers = {
-        "Content-Type": "application/json",
-    }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            url=f"http://{settings.community_service_settings.base_url}:{settings.community_service_settings.port}/community/{community_id}/members",
-            headers=headers,
-            ssl=False,
-        ) as response:
-            response = await response.json()
+async def _find_community(proxy: ProxyEngine, community_id: int) -> CommunityResponseDTO:
+    communities = await proxy.fetch_json(routes.SEARCH_COMMUNITY, params={"id": community_id})
+    if not communities:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Сообщество не найдено")
+    return communities[0]
 
-            return response
\ No newline at end of file
+
+@c_router.get(
+    "/community/{community_id}/overview",
+    summary="Сводная информация о сообществе",
+    status_code=status.HTTP_200_OK,
+    response_model=CommunityOverviewResponseDTO
+)
+async def get_community_overview_send_request_to_service(community_id: int,
+                                                         current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                         proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
+    path_params = {"community_id": community_id}
+
+    # Все части запрашиваются параллельно, JWT проверяется один раз
+    results, errors = await gather_partial({
+        "community": _find_community(proxy, community_id),
+        "location": _get_location(proxy, community_id),
+        "events": _unless_not_found(
+            ("events", community_id),
+            routes.GET_COMMUNITY_EVENTS,
+            lambda: proxy.fetch_json(routes.GET_COMMUNITY_EVENTS, path_params=path_params),
+        ),
+        "members": proxy.fetch_json(routes.GET_MEMBERS, path_params=path_params),
+    })
+
+    return CommunityOverviewResponseDTO(
+        **results,
+        errors={
+            name: SubRequestErrorDTO(status_code=status_code, detail=detail)
+            for name, (status_code, detail) in errors.items()
+        },
+    )
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -137,3 +137,39 @@ class CommunityEventRequestDTO(BaseModel):
     )
 
     model_config = ConfigDict(json_encoders={datetime: lambda v: v.isoformat()})
+
+
+class SubRequestErrorDTO(BaseModel):
+    status_code: int = Field(
+        ..., description="HTTP-статус ошибки"
+    )
+    detail: Any = Field(
+        None, description="Описание ошибки"
+    )
+
+
+class CommunityOverviewResponseDTO(BaseModel):
+    community: Optional[CommunityResponseDTO] = Field(
+        None, description="Сообщество"
+    )
+    location: Optional[CommunityLocationResponseDTO] = Field(
+        None, description="Местоположение сообщества"
+    )
+    events: Optional[List[Any]] = Field(
+        None, description="События сообщества"
+    )
+    members: Optional[List[Any]] = Field(
+        None, description="Участники сообщества"
+    )
+    errors: Dict[str, SubRequestErrorDTO] = Field(
+        default_factory=dict, description="Ошибки частей, которые не удалось получить"
+    )
+
+
+class CommunityLocationsResponseDTO(BaseModel):
+    locations: Dict[int, Optional[CommunityLocationResponseDTO]] = Field(
+        default_factory=dict, description="Местоположения по ID сообщества; null — местоположение не найдено"
+    )
+    errors: Dict[int, SubRequestErrorDTO] = Field(
+        default_factory=dict, description="Ошибки для ID, которые не удалось получить"
+    )
@@ -0,0 +1,139 @@
+from dataclasses import replace
+
+from starlette import status
+
+from community.dto import CommunityResponseDTO, CreateRoleResponseToServiceDTO, CommunityResponseToServiceDTO, \
+    PermissionResponseToServiceDTO, CommunityLocationResponseDTO
+from core.concurrency import PRIORITY_LOW
+from core.proxy import ProxyRoute, RESPONSE_EMPTY, RESPONSE_PASSTHROUGH
+
+
+def to_community(response: dict) -> CommunityResponseDTO:
+    return CommunityResponseDTO(
+        id=response.get("id"),
+        name=response.get("name"),
+        description=response.get("description"),
+        creator_id=response.get("creatorId")
+    )
+
+
+def to_communities(responses: list) -> list:
+    return [to_community(response) for response in responses]
+
+
+def to_role(response: dict) -> CreateRoleResponseToServiceDTO:
+    return CreateRoleResponseToServiceDTO(
+        id=response.get("id"),
+        name=response.get("name"),
+        community=CommunityResponseToServiceDTO(
+            id=response.get("community").get("id"),
+            name=response.get("community").get("name"),
+            creator_id=response.get("community").get("creatorId"),
+            description=response.get("community").get("description"),
+            created_at=response.get("community").get("createdAt"),
+            deleted_at=response.get("community").get("deletedAt"),
+        ),
+        permissions=[PermissionResponseToServiceDTO(
+            id=permission.get("id"),
+            type=permission.get("type"),
+        ) for permission in response.get("permissions")]
+    )
+
+
+def to_community_location(response: dict) -> CommunityLocationResponseDTO:
+    return CommunityLocationResponseDTO(
+        id=response.get("id"),
+        locationType=response.get("locationType"),
+        locationId=response.get("locationId"),
+        communityId=response.get("communityId"),
+    )
+
+
+NO_RIGHTS = (None, "Недостаточно прав")
+
+SEARCH_COMMUNITY = ProxyRoute(
+    "GET", "/community", "community",
+    error=(status.HTTP_404_NOT_FOUND, None),
+    response=to_communities,
+    priority=PRIORITY_LOW,
+    hedge=True,
+)
+CREATE_COMMUNITY = ProxyRoute(
+    "POST", "/community", "community",
+    error=(status.HTTP_404_NOT_FOUND, None),
+    response=to_community,
+)
+CREATE_ROLE = ProxyRoute(
+    "POST", "/community/{community_id}/roles", "community",
+    user_id_param="userId",
+    status_map={status.HTTP_403_FORBIDDEN: (status.HTTP_404_NOT_FOUND, "У вас нет прав")},
+    response=to_role,
+)
+REVOKE_ROLE = ProxyRoute(
+    "POST", "/community/{community_id}/roles/revoke", "community",
+    user_id_param="userId",
+    status_map={
+        status.HTTP_403_FORBIDDEN: NO_RIGHTS,
+        status.HTTP_404_NOT_FOUND: (None, "Связь не найдена"),
+    },
+    mode=RESPONSE_EMPTY,
+)
+ASSIGN_ROLE = ProxyRoute(
+    "POST", "/community/{community_id}/roles/assign", "community",
+    user_id_param="userId",
+    status_map={
+        status.HTTP_403_FORBIDDEN: NO_RIGHTS,
+        status.HTTP_404_NOT_FOUND: (None, "Связь не найдена"),
+        status.HTTP_409_CONFLICT: (None, "Роль уже назначена пользователю"),
+    },
+    mode=RESPONSE_EMPTY,
+)
+DELETE_ROLE = ProxyRoute(
+    "DELETE", "/community/{community_id}/roles/{role_id}", "community",
+    user_id_param="userId",
+    status_map={
+        status.HTTP_403_FORBIDDEN: NO_RIGHTS,
+        status.HTTP_404_NOT_FOUND: (None, "Роль не найдена"),
+    },
+    mode=RESPONSE_EMPTY,
+)
+CREATE_COMMUNITY_LOCATION = ProxyRoute(
+    "POST", "/community-location", "community",
+    status_map={status.HTTP_400_BAD_REQUEST: (None, "Ошибка валидации")},
+    response=to_community_location,
+)
+GET_COMMUNITY_LOCATION = ProxyRoute(
+    "GET", "/community-location/{community_id}", "community",
+    status_map={status.HTTP_404_NOT_FOUND: (None, "Не найдено по данному ID")},
+    response=to_community_location,
+    hedge=True,
+)
+# Тот же запрос в составе массовой выборки уступает одиночным
+GET_COMMUNITY_LOCATION_BULK = replace(GET_COMMUNITY_LOCATION, priority=PRIORITY_LOW)
+GET_COMMUNITY_EVENTS = ProxyRoute(
+    "GET", "/community/{community_id}/events", "community",
+    status_map={status.HTTP_404_NOT_FOUND: (None, "Not found")},
+    mode=RESPONSE_PASSTHROUGH,
+    priority=PRIORITY_LOW,
+)
+CREATE_COMMUNITY_EVENT = ProxyRoute(
+    "POST", "/community/{community_id}/events", "community",
+    user_id_param="userId",
+    status_map={status.HTTP_403_FORBIDDEN: NO_RIGHTS},
+    mode=RESPONSE_PASSTHROUGH,
+)
+DELETE_COMMUNITY_EVENT = ProxyRoute(
+    "DELETE", "/community/{community_id}/events/{event_id}", "community",
+    user_id_param="userId",
+    status_map={status.HTTP_403_FORBIDDEN: NO_RIGHTS},
+    mode=RESPONSE_EMPTY,
+)
+GET_PERMISSIONS = ProxyRoute(
+    "GET", "/permission", "community",
+    mode=RESPONSE_PASSTHROUGH,
+)
+GET_MEMBERS = ProxyRoute(
+    "GET", "/community/{community_id}/members", "community",
+    mode=RESPONSE_PASSTHROUGH,
+    priority=PRIORITY_LOW,
+)
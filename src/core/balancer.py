@@ -0,0 +1,68 @@
+import random
+import time
+from typing import List, Sequence
+
+STRATEGY_P2C = "p2c"
+STRATEGY_LEAST_OUTSTANDING = "least_outstanding"
+
+
+class Instance:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.healthy = True
+
+    def available(self, now: float) -> bool:
+        return self.healthy and self.ejected_until <= now
+
+    def stats(self) -> dict:
+        return {
+            "outstanding": self.outstanding,
+            "healthy": self.healthy,
+            "ejected": self.ejected_until > time.monotonic(),
+        }
+
+
+class LoadBalancer:
+    # Выбор экземпляра сервиса по числу незавершенных запросов.
+    # Экземпляр, подряд ответивший ошибкой eject_failures раз, исключается на eject_duration
+    def __init__(self, base_urls: Sequence[str], strategy: str = STRATEGY_P2C,
+                 eject_failures: int = 3, eject_duration: float = 10.0):
+        self.instances: List[Instance] = [Instance(base_url) for base_url in base_urls]
+        self.strategy = strategy
+        self.eject_failures = eject_failures
+        self.eject_duration = eject_duration
+        self._next = 0
+
+    def pick(self) -> Instance:
+        if len(self.instances) == 1:
+            return self.instances[0]
+
+        now = time.monotonic()
+        candidates = [instance for instance in self.instances if instance.available(now)]
+        if not candidates:
+            # Исключены все: лучше попробовать хоть какой-то экземпляр, чем отказать сразу
+            candidates = self.instances
+
+        if self.strategy == STRATEGY_P2C and len(candidates) > 2:
+            first, second = random.sample(candidates, 2)
+            return first if first.outstanding <= second.outstanding else second
+
+        # Обход начинается со сдвигающейся позиции, чтобы при равенстве нагрузка распределялась по кругу
+        self._next = (self._next + 1) % len(candidates)
+        ordered = candidates[self._next:] + candidates[:self._next]
+        return min(ordered, key=lambda instance: instance.outstanding)
+
+    def record_success(self, instance: Instance):
+        instance.consecutive_failures = 0
+
+    def record_failure(self, instance: Instance):
+        instance.consecutive_failures += 1
+        if 0 < self.eject_failures <= instance.consecutive_failures:
+            instance.ejected_until = time.monotonic() + self.eject_duration
+            instance.consecutive_failures = 0
+
+    def stats(self) -> dict:
+        return {instance.base_url: instance.stats() for instance in self.instances}
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Deque, List, Optional, Tuple
+
+from core import json_codec
+from core.metrics import CAPTURE_RECORDS
+
+logger = logging.getLogger(__name__)
+
+# Статусы ответов сервисов (сервис, статус) для текущего запроса; None — запрос не попал в выборку
+current_upstreams: ContextVar[Optional[List[Tuple[str, int]]]] = ContextVar("captured_upstreams", default=None)
+
+# Форма вложенных запросов /batch (без тел и заголовков); None — внешний запрос не попал в выборку
+current_subrequests: ContextVar[Optional[List[dict]]] = ContextVar("captured_subrequests", default=None)
+
+
+def record_upstream(name: str, status_code: int):
+    upstreams = current_upstreams.get()
+    if upstreams is not None:
+        upstreams.append((name, status_code))
+
+
+async def collect_upstreams(call: Awaitable[Any]) -> Tuple[Any, List[Tuple[str, int]]]:
+    # Для общего запроса single-flight: статусы собираются в отдельный список, и каждый
+    # ожидающий записывает их себе сам. Должна выполняться в собственной задаче,
+    # чтобы set() не затронул контекст вызывающего
+    upstreams: List[Tuple[str, int]] = []
+    current_upstreams.set(upstreams)
+    return await call, upstreams
+
+
+class CaptureWriter:
+    # Запросы копятся в памяти и дописываются в JSONL пачками из отдельного потока:
+    # обработчик запроса никогда не ждет диска, при переполнении записи отбрасываются
+    def __init__(self, path: str, batch_size: int, flush_interval: float, max_pending: int):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Deque[dict] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def submit(self, record: dict):
+        if len(self._pending) >= self.max_pending:
+            CAPTURE_RECORDS.inc(("dropped",))
+            return
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        # Без отмены задачи: пачка, уже отданная потоку, не теряется, остаток дописывается
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            try:
+                await asyncio.to_thread(self._append, batch)
+            except OSError:
+                logger.warning("Failed to write %d captured requests to %s", len(batch), self.path, exc_info=True)
+                CAPTURE_RECORDS.inc(("dropped",), len(batch))
+            else:
+                CAPTURE_RECORDS.inc(("written",), len(batch))
+
+    def _append(self, batch: List[dict]):
+        data = b"".join(json_codec.dumps(record) + b"\n" for record in batch)
+        with open(self.path, "ab") as capture_file:
+            capture_file.write(data)
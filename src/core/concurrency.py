@@ -0,0 +1,65 @@
+import time
+from typing import Optional
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+
+class AdaptiveConcurrencyLimiter:
+    # Лимит одновременных запросов к сервису подстраивается по задержкам (AIMD):
+    # пока задержка близка к базовой — лимит растет на 1 за "окно" запросов,
+    # при росте задержки в tolerance раз или ошибке — умножается на backoff
+    def __init__(self, initial: int, min_limit: int, max_limit: int,
+                 tolerance: float = 2.0, backoff: float = 0.9, smoothing: float = 0.05):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.inflight = 0
+        self.rejected = 0
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+
+    def try_acquire(self, share: float = 1.0) -> bool:
+        # share < 1: запросы низкого приоритета получают только часть лимита,
+        # остаток зарезервирован для более важных
+        if self.inflight >= max(1, int(self.limit * share)):
+            self.rejected += 1
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self, latency: Optional[float], failed: bool = False):
+        # latency=None — запрос отменен или отклонен самим шлюзом, замер не учитывается
+        self.inflight -= 1
+        if latency is None:
+            return
+
+        if not failed:
+            # Базовая задержка — медленное скользящее среднее: резкий рост задержки заметен сразу,
+            # а постепенный сдвиг нормы со временем становится новой нормой
+            if self.baseline is None:
+                self.baseline = latency
+            else:
+                self.baseline += self.smoothing * (latency - self.baseline)
+
+        if failed or latency > self.baseline * self.tolerance:
+            now = time.monotonic()
+            # Не чаще одного снижения за время запроса: пачка медленных ответов — один сигнал
+            if now - self._last_decrease >= latency:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+        elif self.inflight + 1 >= self.limit / 2:
+            # Растем, только если лимит действительно используется
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "rejected": self.rejected,
+            "baseline": self.baseline,
+        }
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Dict, Hashable, Mapping, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette import status
+
+
+def error_of(exc: Exception) -> Tuple[int, Any]:
+    if isinstance(exc, HTTPException):
+        return exc.status_code, exc.detail
+    # Некорректный JSON от сервиса
+    return status.HTTP_502_BAD_GATEWAY, "Некорректный ответ сервиса"
+
+
+async def gather_partial(calls: Mapping[Hashable, Awaitable[Any]],
+                         limit: Optional[int] = None) -> Tuple[Dict[Hashable, Any], Dict[Hashable, Tuple[int, Any]]]:
+    # Запускает вызовы конкурентно (не больше limit одновременно) и не падает целиком,
+    # если часть из них завершилась ошибкой HTTP или вернула некорректный ответ
+    semaphore = asyncio.Semaphore(limit) if limit else None
+
+    async def run(call: Awaitable[Any]) -> Any:
+        if semaphore is None:
+            return await call
+        async with semaphore:
+            return await call
+
+    names = list(calls)
+    outcomes = await asyncio.gather(*(run(calls[name]) for name in names), return_exceptions=True)
+
+    results: Dict[Hashable, Any] = {}
+    errors: Dict[Hashable, Tuple[int, Any]] = {}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, (HTTPException, ValueError)):
+            errors[name] = error_of(outcome)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results[name] = outcome
+    return results, errors
@@ -0,0 +1,30 @@
+import math
+from collections import deque
+from typing import Optional
+
+
+class LatencyWindow:
+    # Скользящее окно последних задержек; перцентиль пересчитывается не на каждый замер,
+    # а раз в refresh_every записей — сортировка окна не попадает на каждый запрос
+    def __init__(self, size: int = 1000, min_samples: int = 50, refresh_every: int = 100):
+        self.min_samples = min_samples
+        self.refresh_every = max(1, refresh_every)
+        self._samples: "deque[float]" = deque(maxlen=size)
+        self._since_refresh = 0
+        self._sorted: list = []
+
+    def record(self, latency: float):
+        self._samples.append(latency)
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every or len(self._samples) == self.min_samples:
+            self._sorted = sorted(self._samples)
+            self._since_refresh = 0
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self._sorted) < self.min_samples:
+            return None
+        index = min(len(self._sorted) - 1, max(0, math.ceil(p / 100 * len(self._sorted)) - 1))
+        return self._sorted[index]
+
+    def __len__(self):
+        return len(self._samples)
@@ -0,0 +1,35 @@
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+from core.timing import phase, PHASE_SERIALIZE
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен, без него работает stdlib json
+    orjson = None
+
+
+if orjson is not None:
+    CODEC_NAME = "orjson"
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(data: bytes) -> Any:
+        return orjson.loads(data)
+else:
+    CODEC_NAME = "json"
+
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(data: bytes) -> Any:
+        return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with phase(PHASE_SERIALIZE):
+            return dumps(content)
@@ -0,0 +1,59 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class VerifiedTokenCache:
+    def __init__(self, maxsize: int, max_ttl: float):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # Храним не сам токен, а его дайджест
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict):
+        if self.maxsize <= 0:
+            return
+
+        expires_at = time.time() + self.max_ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+
+        key = self._key(token)
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
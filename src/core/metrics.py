@@ -0,0 +1,179 @@
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Все обновления идут из одного цикла событий: счетчики — обычные числа, без блокировок
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+# (labels, value) для метрик, значения которых собираются в момент запроса /metrics
+Sample = Tuple[Dict[str, str], float]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, labels: Labels, value: float):
+        self._values[labels] = value
+
+    def dec(self, labels: Labels = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # На серию: счетчики по корзинам (последняя — +Inf), сумма значений.
+        # Накопительные значения корзин считаются только при выдаче
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Labels, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def render(self) -> Iterable[str]:
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total[0])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        # Метрики, которые собираются при выдаче: name -> (type, help, функция со списком значений)
+        self._collectors: Dict[str, Tuple[str, str, Callable[[], Iterable[Sample]]]] = {}
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collect(self, name: str, metric_type: str, documentation: str, fn: Callable[[], Iterable[Sample]]):
+        # Повторная регистрация (например, при перезапуске lifespan) заменяет прежнюю
+        self._collectors[name] = (metric_type, documentation, fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+
+        for name, (metric_type, documentation, fn) in self._collectors.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in fn():
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "gateway_requests_total", "Requests handled by the gateway", ("route", "method", "status_class"),
+)
+REQUEST_DURATION = registry.histogram(
+    "gateway_request_duration_seconds", "Gateway request latency", ("route", "method"),
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "gateway_requests_in_flight", "Requests currently being handled",
+)
+UPSTREAM_CONNECT = registry.histogram(
+    "gateway_upstream_connect_seconds", "Time to open a new connection to an upstream", ("upstream",),
+)
+UPSTREAM_WAIT = registry.histogram(
+    "gateway_upstream_wait_seconds", "Time until upstream response headers, including pool wait and connect",
+    ("upstream",),
+)
+UPSTREAM_DURATION = registry.histogram(
+    "gateway_upstream_duration_seconds", "Total upstream attempt time including the response body",
+    ("upstream", "status_class"),
+)
+CAPTURE_RECORDS = registry.counter(
+    "gateway_capture_records_total", "Captured requests by outcome (written / dropped)", ("result",),
+)
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+caches: Dict[str, object] = {}
+
+
+def register_cache(name: str, cache):
+    # Кэш должен иметь stats() с полями size / hits / misses
+    caches[name] = cache
+
+
+def _cache_samples(field: str) -> Callable[[], Iterable[Sample]]:
+    def samples() -> Iterable[Sample]:
+        for name, cache in caches.items():
+            yield {"cache": name}, cache.stats()[field]
+
+    return samples
+
+
+registry.collect("gateway_cache_hits_total", "counter", "Cache hits", _cache_samples("hits"))
+registry.collect("gateway_cache_misses_total", "counter", "Cache misses", _cache_samples("misses"))
+registry.collect("gateway_cache_entries", "gauge", "Entries currently cached", _cache_samples("size"))
@@ -0,0 +1,233 @@
+import hashlib
+import logging
+import os
+import random
+import time
+from typing import Callable, Iterable
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core import json_codec, profiler
+from core.capture import CaptureWriter, current_subrequests, current_upstreams
+from core.subrequest import is_subrequest
+from core.metrics import REQUESTS, REQUEST_DURATION, REQUESTS_IN_FLIGHT, status_class
+from core.timing import RequestTimings, current_timings
+
+UNMATCHED_ROUTE = "unmatched"
+
+timing_logger = logging.getLogger("gateway.timing")
+
+# Значения этих параметров запроса не попадают в запись трафика
+SENSITIVE_PARAMS = frozenset({"token", "access_token", "refresh_token", "password", "secret", "api_key"})
+REDACTED = "[redacted]"
+
+
+class MetricsMiddleware:
+    # Чистый ASGI, без BaseHTTPMiddleware: ни лишних задач, ни копирования тела ответа
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Шаблон пути маршрута, а не сам путь: число серий не зависит от ID в запросах
+            route = scope.get("route")
+            path = route.path if route is not None else UNMATCHED_ROUTE
+            method = scope["method"]
+            REQUESTS.inc((path, method, status_class(status_code)))
+            REQUEST_DURATION.observe((path, method), time.perf_counter() - started)
+
+
+class ServerTimingMiddleware:
+    # Разбивка времени запроса по фазам: заголовок Server-Timing и/или выборочный структурный лог
+    def __init__(self, app: ASGIApp, header: bool = True, log_sample_rate: float = 0.0):
+        self.app = app
+        self.header = header
+        self.log_sample_rate = log_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sampled = self.log_sample_rate > 0 and random.random() < self.log_sample_rate
+        if not self.header and not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.header:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            if sampled:
+                route = scope.get("route")
+                timing_logger.info(json_codec.dumps({
+                    "route": route.path if route is not None else UNMATCHED_ROUTE,
+                    "method": scope["method"],
+                    "status": status_code,
+                    "total_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in timings.phases.items()},
+                }).decode("utf-8"))
+
+
+class ProfilerMiddleware:
+    # Считает завершенные запросы для сессии профилирования "на N запросов"
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session = profiler.active_session
+            if session is not None and scope["type"] == "http":
+                session.request_finished(scope["path"])
+
+
+class CaptureMiddleware:
+    # Выборочная запись трафика для воспроизведения: без заголовков и тел, только их форма.
+    # Клиент обезличен ключевым хэшем Authorization; ключ живет в памяти процесса,
+    # поэтому запись нельзя сопоставить с токенами, но запросы одного клиента остаются связаны
+    def __init__(self, app: ASGIApp, writer: CaptureWriter, sample_rate: float, excluded_routes: Iterable[str] = ()):
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+        # Служебные маршруты (метрики, профилировщик) не пишутся: это не трафик клиентов
+        self.excluded_routes = frozenset(excluded_routes)
+        self._client_key = os.urandom(16)
+
+    def _excluded(self, scope: Scope) -> bool:
+        route = scope.get("route")
+        return route is not None and route.path in self.excluded_routes
+
+    def _client(self, scope: Scope):
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                return hashlib.blake2b(value, key=self._client_key, digest_size=8).hexdigest()
+        return None
+
+    @staticmethod
+    def _query(scope: Scope) -> list:
+        query = scope.get("query_string", b"").decode("latin-1")
+        return [[name, REDACTED if name.lower() in SENSITIVE_PARAMS else value]
+                for name, value in parse_qsl(query, keep_blank_values=True)]
+
+    def _shape(self, scope: Scope, body_bytes: int) -> dict:
+        route = scope.get("route")
+        content_type = ""
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                # Без boundary и прочих параметров
+                content_type = value.decode("latin-1").split(";", 1)[0].strip()
+        return {
+            "method": scope["method"],
+            "route": route.path if route is not None else UNMATCHED_ROUTE,
+            "path": scope["path"],
+            "query": self._query(scope),
+            "content_type": content_type,
+            "body_bytes": body_bytes,
+        }
+
+    async def _forward(self, scope: Scope, receive: Receive, send: Send, done: Callable[[int, int], None]):
+        status_code = 500
+        body_bytes = 0
+
+        async def receive_counting() -> Message:
+            nonlocal body_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                body_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_counting, send_with_status)
+        finally:
+            done(status_code, body_bytes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if is_subrequest(scope):
+            # Вложенный запрос /batch пишется не отдельной записью, а в items внешнего:
+            # при воспроизведении тело /batch собирается из них заново
+            subrequests = current_subrequests.get()
+            if subrequests is None:
+                await self.app(scope, receive, send)
+                return
+            def add_subrequest(status_code: int, body_bytes: int):
+                if not self._excluded(scope):
+                    subrequests.append(dict(self._shape(scope, body_bytes), status=status_code))
+
+            await self._forward(scope, receive, send, add_subrequest)
+            return
+
+        if random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        # Статусы сервисов вложенных запросов попадают в запись внешнего
+        upstreams = []
+        subrequests = []
+        upstreams_token = current_upstreams.set(upstreams)
+        subrequests_token = current_subrequests.set(subrequests)
+        captured_at = time.time()
+        started = time.perf_counter()
+
+        def done(status_code: int, body_bytes: int):
+            current_upstreams.reset(upstreams_token)
+            current_subrequests.reset(subrequests_token)
+            if self._excluded(scope):
+                return
+            record = {"ts": round(captured_at, 6)}
+            record.update(self._shape(scope, body_bytes))
+            record.update({
+                "client": self._client(scope),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "upstreams": [{"service": name, "status": upstream_status} for name, upstream_status in upstreams],
+            })
+            if subrequests:
+                record["items"] = subrequests
+            self.writer.submit(record)
+
+        await self._forward(scope, receive, send, done)
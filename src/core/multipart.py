@@ -0,0 +1,176 @@
+import uuid
+from typing import AsyncIterator, Dict, List, Mapping, Optional
+
+from fastapi import HTTPException
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette import status
+from starlette.requests import ClientDisconnect
+
+
+class UploadBudget:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+
+    def reserve(self, size: int) -> bool:
+        if self.in_flight + size > self.limit:
+            return False
+        self.in_flight += size
+        return True
+
+    def release(self, size: int):
+        self.in_flight = max(0, self.in_flight - size)
+
+
+def _quote(value: bytes) -> bytes:
+    return value.replace(b"\r", b"").replace(b"\n", b"").replace(b'"', b"%22")
+
+
+# Перекладывает входящий multipart/form-data в запрос к сервису по мере поступления:
+# поля переименовываются по fields, неизвестные отбрасываются, extra_fields идут первыми,
+# содержимое файлов не буферизуется
+class MultipartRelay:
+    def __init__(self, content_type: str, fields: Mapping[str, str], extra_fields: Mapping[str, str],
+                 max_bytes: int, budget: UploadBudget):
+        _, options = parse_options_header(content_type)
+        if b"boundary" not in options:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing boundary in multipart.")
+
+        self.fields = {name.encode(): target.encode() for name, target in fields.items()}
+        self.extra_fields = extra_fields
+        self.max_bytes = max_bytes
+        self.budget = budget
+        self.boundary = uuid.uuid4().hex.encode()
+        self.content_type = f"multipart/form-data; boundary={self.boundary.decode()}"
+        self.received = 0
+
+        self._reserved = 0
+        self._out: List[bytes] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._target: Optional[bytes] = None
+        self._is_file = False
+        self._value = bytearray()
+        self._parser = MultipartParser(options[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+
+    def reserve_declared(self, content_length: Optional[str]):
+        if not content_length or not content_length.isdigit():
+            return
+        self._reserve(int(content_length))
+
+    async def body(self, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        try:
+            for name, value in self.extra_fields.items():
+                yield self._field(name.encode(), value.encode())
+
+            async for chunk in self._client_stream(stream):
+                self.received += len(chunk)
+                if self.received > self._reserved:
+                    self._reserve(self.received - self._reserved)
+
+                try:
+                    self._parser.write(chunk)
+                except MultipartParseError:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректное тело multipart")
+                if self._out:
+                    yield b"".join(self._out)
+                    self._out.clear()
+
+            self._parser.finalize()
+            yield b"--" + self.boundary + b"--\r\n"
+        finally:
+            self.release()
+
+    @staticmethod
+    async def _client_stream(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        # Обрыв загрузки — ошибка клиента: без HTTPException aiohttp принял бы ее
+        # за сбой соединения с сервисом, и она попала бы в breaker, балансировщик и лимитер
+        try:
+            async for chunk in stream:
+                yield chunk
+        except ClientDisconnect:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Загрузка прервана клиентом")
+
+    def release(self):
+        self.budget.release(self._reserved)
+        self._reserved = 0
+
+    def _reserve(self, size: int):
+        if self._reserved + size > self.max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Размер загружаемого файла превышает допустимый",
+            )
+        if not self.budget.reserve(size):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Слишком много одновременных загрузок",
+                headers={"Retry-After": "1"},
+            )
+        self._reserved += size
+
+    def _field(self, name: bytes, value: bytes) -> bytes:
+        return (b"--" + self.boundary + b"\r\nContent-Disposition: form-data; name=\"" + _quote(name)
+                + b"\"\r\n\r\n" + value + b"\r\n")
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._target = None
+        self._is_file = False
+        self._value = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        self._target = self.fields.get(options.get(b"name", b""))
+        filename = options.get(b"filename")
+        self._is_file = filename is not None
+        if self._target is None or not self._is_file:
+            return
+
+        # Пустой файл без имени браузер присылает, когда фото не выбрано
+        if not filename:
+            self._target = None
+            return
+
+        content_type = self._headers.get(b"content-type", b"application/octet-stream")
+        self._out.append(
+            b"--" + self.boundary + b"\r\nContent-Disposition: form-data; name=\"" + _quote(self._target)
+            + b"\"; filename=\"" + _quote(filename) + b"\"\r\nContent-Type: " + _quote(content_type) + b"\r\n\r\n"
+        )
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._target is None:
+            return
+        if self._is_file:
+            self._out.append(data[start:end])
+        else:
+            self._value += data[start:end]
+
+    def _on_part_end(self):
+        if self._target is None:
+            return
+        if self._is_file:
+            self._out.append(b"\r\n")
+        elif self._value:
+            self._out.append(self._field(self._target, bytes(self._value)))
@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from core.response_cache import PendingFills
+
+
+class NegativeCache:
+    # Запоминает ключи, для которых сервис ответил 404, на короткое время
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        # 404, полученный до создания ресурса (discard), не запоминается
+        self._lookups = PendingFills()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            self.misses += 1
+            return False
+
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+    def begin(self, key: Hashable) -> object:
+        return self._lookups.begin(key)
+
+    def finish(self, key: Hashable, token: object):
+        self._lookups.finish(key, token)
+
+    def add(self, key: Hashable, token: Optional[object] = None):
+        if token is not None and not self._lookups.finish(key, token):
+            return
+        if not self.enabled:
+            return
+
+        self._entries[key] = time.monotonic() + self.ttl
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        self._lookups.invalidate(key)
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._lookups.clear()
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
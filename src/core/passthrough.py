@@ -0,0 +1,55 @@
+from typing import Callable, Mapping, Optional
+
+from fastapi import HTTPException
+from starlette.responses import Response, StreamingResponse
+
+from core.upstream import Upstream
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _content_type_headers(headers: Mapping[str, str]) -> dict:
+    return {"Content-Type": headers.get("Content-Type", "application/json")}
+
+
+# (статус, reason) ответа сервиса -> ошибка шлюза; None — ответ отдается как есть
+ErrorMapper = Callable[[int, Optional[str]], Optional[HTTPException]]
+
+
+def _no_errors(status: int, reason: Optional[str]) -> Optional[HTTPException]:
+    return None
+
+
+async def passthrough(upstream: Upstream, method: str, path: str,
+                      errors: ErrorMapper = _no_errors, **kwargs) -> Response:
+    if method == "GET" and upstream.coalesce_gets:
+        # Общий буфер single-flight отдаем как есть, без разбора JSON
+        response = await upstream.fetch(method, path, **kwargs)
+        error = errors(response.status, response.reason)
+        if error is not None:
+            raise error
+
+        return Response(
+            content=response.body,
+            status_code=response.status,
+            headers=_content_type_headers(response.headers),
+        )
+
+    response = await upstream.open(method, path, **kwargs)
+    error = errors(response.status, response.reason)
+    if error is not None:
+        response.release()
+        raise error
+
+    async def relay():
+        try:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                yield chunk
+        finally:
+            response.release()
+
+    return StreamingResponse(
+        relay(),
+        status_code=response.status,
+        headers=_content_type_headers(response.headers),
+    )
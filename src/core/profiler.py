@@ -0,0 +1,91 @@
+import asyncio
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+
+def _collapse(frame) -> str:
+    # Стек в формате collapsed stacks (flamegraph.pl, speedscope): от корня к листу через ";"
+    names: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfileSession:
+    # Статистический профиль потока цикла событий: отдельный поток раз в interval
+    # снимает его текущий стек, параллельно замеряется задержка цикла событий
+    def __init__(self, interval: float, max_requests: int = 0, route_prefix: str = ""):
+        self.interval = interval
+        self.max_requests = max_requests
+        self.route_prefix = route_prefix
+        self.stacks: "Counter[str]" = Counter()
+        self.samples = 0
+        self.requests_matched = 0
+        self.loop_lags: List[float] = []
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._done = asyncio.Event()
+
+    def request_finished(self, path: str):
+        if not self.max_requests or not path.startswith(self.route_prefix):
+            return
+        self.requests_matched += 1
+        if self.requests_matched >= self.max_requests:
+            self._done.set()
+
+    async def run(self, seconds: float):
+        thread_id = threading.get_ident()
+        sampler = threading.Thread(target=self._sample, args=(thread_id,), name="gateway-profiler", daemon=True)
+        lag_monitor = asyncio.get_running_loop().create_task(self._monitor_loop_lag())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._stop.set()
+            lag_monitor.cancel()
+            await asyncio.to_thread(sampler.join)
+            self.duration = time.perf_counter() - started
+
+    def _sample(self, thread_id: int):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                return
+            self.stacks[_collapse(frame)] += 1
+            self.samples += 1
+
+    async def _monitor_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.loop_lags.append(max(0.0, loop.time() - started - self.interval))
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def loop_lag_summary(self) -> dict:
+        if not self.loop_lags:
+            return {"samples": 0, "mean_ms": None, "p99_ms": None, "max_ms": None}
+
+        lags = sorted(self.loop_lags)
+        return {
+            "samples": len(lags),
+            "mean_ms": round(sum(lags) / len(lags) * 1000, 3),
+            "p99_ms": round(lags[min(len(lags) - 1, math.ceil(0.99 * len(lags)) - 1)] * 1000, 3),
+            "max_ms": round(lags[-1] * 1000, 3),
+        }
+
+
+# Одновременно идет не больше одной сессии профилирования
+active_session: Optional[ProfileSession] = None
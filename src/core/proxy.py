@@ -0,0 +1,139 @@
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+from fastapi import HTTPException
+
+from core import json_codec
+from core.concurrency import PRIORITY_NORMAL
+from core.passthrough import passthrough
+from core.timing import phase, PHASE_DTO
+from core.upstream import UpstreamClients, UpstreamResponse
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# (статус шлюза, detail); None — взять статус / reason из ответа сервиса
+StatusMapping = Tuple[Optional[int], Optional[str]]
+
+RESPONSE_JSON = "json"
+RESPONSE_EMPTY = "empty"
+RESPONSE_PASSTHROUGH = "passthrough"
+
+
+@dataclass(frozen=True)
+class ProxyRoute:
+    method: str
+    path: str
+    upstream: str
+    user_id_param: Optional[str] = None
+    status_map: Mapping[int, StatusMapping] = field(default_factory=dict)
+    ok_status: int = 200
+    error: Optional[StatusMapping] = None
+    response: Optional[Callable[[Any], Any]] = None
+    mode: str = RESPONSE_JSON
+    priority: int = PRIORITY_NORMAL
+    # Разрешено ли дублировать медленный запрос (только идемпотентные GET)
+    hedge: bool = False
+    path_fields: Tuple[str, ...] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # Шаблон пути разбирается один раз при импорте таблицы маршрутов
+        fields = tuple(name for _, name, _, _ in Formatter().parse(self.path) if name)
+        object.__setattr__(self, "path_fields", fields)
+
+    def url(self, path_params: Optional[Mapping[str, Any]] = None) -> str:
+        if not self.path_fields:
+            return self.path
+        return self.path.format_map(path_params)
+
+    def query(self, user_id: Any = None, params: Optional[Mapping[str, Any]] = None) -> Optional[dict]:
+        if self.user_id_param is None:
+            return dict(params) if params else None
+
+        query = dict(params) if params else {}
+        query[self.user_id_param] = user_id
+        return query
+
+    def mapped_error(self, status: int, reason: Optional[str]) -> Optional[HTTPException]:
+        mapping = self.status_map.get(status)
+        if mapping is None and self.error is not None and status != self.ok_status:
+            mapping = self.error
+        if mapping is None:
+            return None
+
+        status_code, detail = mapping
+        return HTTPException(
+            status_code=status if status_code is None else status_code,
+            detail=reason if detail is None else detail,
+        )
+
+
+class ProxyEngine:
+    def __init__(self, upstreams: UpstreamClients):
+        self._upstreams = {upstream.name: upstream for upstream in upstreams}
+
+    def _request_kwargs(self, route: ProxyRoute, user_id: Any, path_params: Optional[Mapping[str, Any]],
+                        params: Optional[Mapping[str, Any]], json_body: Any, data: Any,
+                        headers: Optional[Mapping[str, str]]) -> dict:
+        kwargs = {
+            "headers": JSON_HEADERS if headers is None else headers,
+            "priority": route.priority,
+            "hedge": route.path if route.hedge else None,
+        }
+        query = route.query(user_id, params)
+        if query is not None:
+            kwargs["params"] = query
+        if json_body is not None:
+            kwargs["data"] = json_codec.dumps(json_body)
+        elif data is not None:
+            kwargs["data"] = data
+        return kwargs
+
+    async def fetch(self, route: ProxyRoute, *, user_id: Any = None, path_params: Optional[Mapping[str, Any]] = None,
+                    params: Optional[Mapping[str, Any]] = None, json_body: Any = None, data: Any = None,
+                    headers: Optional[Mapping[str, str]] = None) -> UpstreamResponse:
+        upstream = self._upstreams[route.upstream]
+        kwargs = self._request_kwargs(route, user_id, path_params, params, json_body, data, headers)
+        return await upstream.fetch(route.method, route.url(path_params), **kwargs)
+
+    def forget(self, route: ProxyRoute, *, path_params: Optional[Mapping[str, Any]] = None):
+        self._upstreams[route.upstream].forget_inflight(route.url(path_params))
+
+    async def call(self, route: ProxyRoute, *, user_id: Any = None, path_params: Optional[Mapping[str, Any]] = None,
+                   params: Optional[Mapping[str, Any]] = None, json_body: Any = None, data: Any = None,
+                   headers: Optional[Mapping[str, str]] = None) -> Any:
+        if route.mode == RESPONSE_PASSTHROUGH:
+            upstream = self._upstreams[route.upstream]
+            kwargs = self._request_kwargs(route, user_id, path_params, params, json_body, data, headers)
+            # Та же таблица статусов, что и у буферизованных маршрутов, включая error
+            return await passthrough(upstream, route.method, route.url(path_params), errors=route.mapped_error,
+                                     **kwargs)
+
+        response = await self.fetch(route, user_id=user_id, path_params=path_params, params=params,
+                                    json_body=json_body, data=data, headers=headers)
+        error = route.mapped_error(response.status, response.reason)
+        if error is not None:
+            raise error
+
+        if route.mode == RESPONSE_EMPTY:
+            return None
+
+        with phase(PHASE_DTO):
+            payload = response.json()
+            return payload if route.response is None else route.response(payload)
+
+    async def fetch_json(self, route: ProxyRoute, *, user_id: Any = None,
+                         path_params: Optional[Mapping[str, Any]] = None,
+                         params: Optional[Mapping[str, Any]] = None) -> Any:
+        # Строгий вариант call для составных запросов: любой ответ >= 400 — ошибка,
+        # тело всегда декодируется (в том числе для маршрутов passthrough)
+        response = await self.fetch(route, user_id=user_id, path_params=path_params, params=params)
+        error = route.mapped_error(response.status, response.reason)
+        if error is None and response.status >= 400:
+            error = HTTPException(status_code=response.status, detail=response.reason)
+        if error is not None:
+            raise error
+
+        with phase(PHASE_DTO):
+            payload = response.json()
+            return payload if route.response is None else route.response(payload)
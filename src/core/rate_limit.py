@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Tuple
+
+
+class TokenBucketLimiter:
+    # Корзина на ключ: rate токенов в секунду, не больше burst про запас.
+    # Ключи разложены по шардам, каждый шард — LRU: вытеснение и очистка
+    # простаивающих ключей затрагивают только один небольшой шард
+    def __init__(self, rate: float, burst: int, max_keys: int, shards: int = 16):
+        self.rate = rate
+        self.burst = float(burst)
+        self.shards = max(1, shards)
+        self.max_keys_per_shard = max(1, max_keys // self.shards)
+        # За это время корзина гарантированно наполняется: удалить ее — то же, что оставить полной
+        self.idle_ttl = self.burst / rate if rate > 0 else float("inf")
+        self.limited = 0
+        self._shards: List["OrderedDict[Hashable, Tuple[float, float]]"] = [
+            OrderedDict() for _ in range(self.shards)
+        ]
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 and self.burst > 0
+
+    def acquire(self, key: Hashable) -> float:
+        # 0 — запрос разрешен, иначе сколько секунд ждать следующего токена.
+        # Метод синхронный: в цикле событий обновление корзины атомарно без блокировок
+        if not self.enabled:
+            return 0.0
+
+        now = time.monotonic()
+        shard = self._shards[hash(key) % self.shards]
+        self._evict_idle(shard, now)
+
+        entry = shard.get(key)
+        if entry is None:
+            tokens = self.burst
+        else:
+            tokens, updated_at = entry
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+
+        if tokens >= 1.0:
+            shard[key] = (tokens - 1.0, now)
+            shard.move_to_end(key)
+            while len(shard) > self.max_keys_per_shard:
+                shard.popitem(last=False)
+            return 0.0
+
+        shard[key] = (tokens, now)
+        shard.move_to_end(key)
+        self.limited += 1
+        return (1.0 - tokens) / self.rate
+
+    def _evict_idle(self, shard: "OrderedDict[Hashable, Tuple[float, float]]", now: float):
+        # Самые давние ключи — в начале шарда
+        while shard:
+            key, (_, updated_at) = next(iter(shard.items()))
+            if now - updated_at < self.idle_ttl:
+                break
+            del shard[key]
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def stats(self) -> dict:
+        return {"size": len(self), "limited": self.limited}
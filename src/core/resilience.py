@@ -0,0 +1,68 @@
+import time
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.failure_threshold <= 0 or self.state == STATE_CLOSED:
+            return True
+
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+
+        # В полуоткрытом состоянии пропускаем ровно один пробный запрос;
+        # зависший (например, отмененный) пробный запрос не блокирует цепь навсегда
+        now = time.monotonic()
+        if self._probe_in_flight and now - self._probe_started < self.reset_timeout:
+            return False
+        self._probe_in_flight = True
+        self._probe_started = now
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.state = STATE_CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold > 0:
+            self.state = STATE_OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def retry_after(self) -> int:
+        return max(1, int(self.reset_timeout - (time.monotonic() - self._opened_at)) + 1)
+
+
+class RetryBudget:
+    # Каждый запрос пополняет бюджет на ratio, каждый повтор тратит единицу:
+    # в установившемся режиме повторов не больше ratio от общего трафика
+    def __init__(self, ratio: float, min_balance: float = 10.0):
+        self.ratio = ratio
+        self.capacity = max(min_balance, 1.0)
+        self.balance = self.capacity
+
+    def deposit(self):
+        self.balance = min(self.capacity, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.balance < 1.0:
+            return False
+        self.balance -= 1.0
+        return True
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    status_code: int
+    media_type: str = "application/json"
+    etag: Optional[str] = None
+
+    def to_response(self) -> Response:
+        headers = {"ETag": self.etag} if self.etag is not None else None
+        return Response(content=self.body, status_code=self.status_code, media_type=self.media_type, headers=headers)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or etag is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    # Для If-None-Match используется слабое сравнение: W/ не учитывается
+    candidates = (value.strip() for value in if_none_match.split(","))
+    return any((value[2:] if value.startswith("W/") else value) == etag for value in candidates)
+
+
+class PendingFills:
+    # Заполнения кэша, начатые до записи или инвалидации ключа, не сохраняются.
+    # Учет ведется по ключу: запись одного ключа не отбрасывает заполнения остальных
+    def __init__(self):
+        self._fills: Dict[Hashable, Set[object]] = {}
+
+    def begin(self, key: Hashable) -> object:
+        token = object()
+        self._fills.setdefault(key, set()).add(token)
+        return token
+
+    def finish(self, key: Hashable, token: object) -> bool:
+        # True — после начала заполнения ключ не менялся и результат можно сохранить
+        tokens = self._fills.get(key)
+        if tokens is None or token not in tokens:
+            return False
+        tokens.discard(token)
+        if not tokens:
+            del self._fills[key]
+        return True
+
+    def invalidate(self, key: Hashable):
+        self._fills.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]):
+        for key in [key for key in self._fills if predicate(key)]:
+            del self._fills[key]
+
+    def clear(self):
+        self._fills.clear()
+
+
+class ResponseCache:
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, maxsize: int = 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[CachedResponse, float]]" = OrderedDict()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self._fills = PendingFills()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    async def get_or_fetch(self, key: Hashable,
+                           fetch: Callable[[], Awaitable[CachedResponse]]) -> CachedResponse:
+        if not self.enabled:
+            return await fetch()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            cached, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            if age < self.ttl + self.stale_ttl:
+                # Отдаем устаревший ответ, обновление идет в фоне одной задачей
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._schedule_refresh(key, fetch)
+                return cached
+
+        self.misses += 1
+        token = self._fills.begin(key)
+        try:
+            cached = await fetch()
+        finally:
+            current = self._fills.finish(key, token)
+        if current:
+            self._store(key, cached)
+        return cached
+
+    def put(self, key: Hashable, cached: CachedResponse):
+        self._fills.invalidate(key)
+        self._entries.pop(key, None)
+        if self.enabled:
+            self._store(key, cached)
+
+    def invalidate(self, key: Hashable):
+        self._fills.invalidate(key)
+        self._entries.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        self._fills.invalidate_matching(predicate)
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        self._fills.clear()
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _store(self, key: Hashable, cached: CachedResponse):
+        # Кэшируем только успешные ответы
+        if cached.status_code != 200:
+            return
+
+        self._entries[key] = (cached, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _schedule_refresh(self, key: Hashable, fetch: Callable[[], Awaitable[CachedResponse]]):
+        if key in self._refreshing:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._refresh(key, fetch))
+        self._refreshing[key] = task
+
+    async def _refresh(self, key: Hashable, fetch: Callable[[], Awaitable[CachedResponse]]):
+        token = self._fills.begin(key)
+        try:
+            cached = await fetch()
+            if self._fills.finish(key, token):
+                self._store(key, cached)
+        except Exception:
+            logger.warning("Background refresh failed for %r, keeping stale entry", key, exc_info=True)
+        finally:
+            self._fills.finish(key, token)
+            self._refreshing.pop(key, None)
@@ -1,5 +1,6 @@
 import os
 import sys
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
@@ -10,6 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 class JWTSettings(BaseSettings):
     secret_key: str = Field(..., min_length=8, max_length=64, validation_alias='JWT_SECRET_KEY')
     algorithm: str = Field(..., max_length=64, validation_alias='JWT_ALGORITHM')
+    cache_size: int = Field(10000, ge=0, validation_alias='JWT_CACHE_SIZE')
+    cache_max_ttl: float = Field(300.0, gt=0, validation_alias='JWT_CACHE_MAX_TTL')
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
 
@@ -17,6 +20,20 @@ class JWTSettings(BaseSettings):
 class AuthServiceSettings(BaseSettings):
     base_url: str = Field(..., validation_alias='AUTH_BASE_URL')
     port: int = Field(..., validation_alias='AUTH_PORT')
+    # Несколько экземпляров сервиса: "host:port,host:port"; пусто — только base_url:port
+    instances: str = Field("", validation_alias='AUTH_INSTANCES')
+    connect_timeout: float = Field(1.0, gt=0, validation_alias='AUTH_CONNECT_TIMEOUT')
+    read_timeout: float = Field(10.0, gt=0, validation_alias='AUTH_READ_TIMEOUT')
+    breaker_failure_threshold: int = Field(5, ge=0, validation_alias='AUTH_BREAKER_FAILURE_THRESHOLD')
+    breaker_reset_timeout: float = Field(15.0, gt=0, validation_alias='AUTH_BREAKER_RESET_TIMEOUT')
+    retry_attempts: int = Field(2, ge=0, validation_alias='AUTH_RETRY_ATTEMPTS')
+    retry_budget_ratio: float = Field(0.1, ge=0, validation_alias='AUTH_RETRY_BUDGET_RATIO')
+    concurrency_initial: int = Field(50, gt=0, validation_alias='AUTH_CONCURRENCY_INITIAL')
+    concurrency_min: int = Field(5, gt=0, validation_alias='AUTH_CONCURRENCY_MIN')
+    concurrency_max: int = Field(200, gt=0, validation_alias='AUTH_CONCURRENCY_MAX')
+    concurrency_latency_tolerance: float = Field(2.0, gt=1, validation_alias='AUTH_CONCURRENCY_LATENCY_TOLERANCE')
+    refresh_hold_seconds: float = Field(5.0, ge=0, validation_alias='AUTH_REFRESH_HOLD_SECONDS')
+    refresh_hold_size: int = Field(10000, ge=0, validation_alias='AUTH_REFRESH_HOLD_SIZE')
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
 
@@ -24,6 +41,18 @@ class AuthServiceSettings(BaseSettings):
 class PersonalAccountServiceSettings(BaseSettings):
     base_url: str = Field(..., validation_alias='PA_BASE_URL')
     port: int = Field(..., validation_alias='PA_PORT')
+    # Несколько экземпляров сервиса: "host:port,host:port"; пусто — только base_url:port
+    instances: str = Field("", validation_alias='PA_INSTANCES')
+    connect_timeout: float = Field(1.0, gt=0, validation_alias='PA_CONNECT_TIMEOUT')
+    read_timeout: float = Field(10.0, gt=0, validation_alias='PA_READ_TIMEOUT')
+    breaker_failure_threshold: int = Field(5, ge=0, validation_alias='PA_BREAKER_FAILURE_THRESHOLD')
+    breaker_reset_timeout: float = Field(15.0, gt=0, validation_alias='PA_BREAKER_RESET_TIMEOUT')
+    retry_attempts: int = Field(2, ge=0, validation_alias='PA_RETRY_ATTEMPTS')
+    retry_budget_ratio: float = Field(0.1, ge=0, validation_alias='PA_RETRY_BUDGET_RATIO')
+    concurrency_initial: int = Field(50, gt=0, validation_alias='PA_CONCURRENCY_INITIAL')
+    concurrency_min: int = Field(5, gt=0, validation_alias='PA_CONCURRENCY_MIN')
+    concurrency_max: int = Field(200, gt=0, validation_alias='PA_CONCURRENCY_MAX')
+    concurrency_latency_tolerance: float = Field(2.0, gt=1, validation_alias='PA_CONCURRENCY_LATENCY_TOLERANCE')
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
 
@@ -31,14 +60,153 @@ class PersonalAccountServiceSettings(BaseSettings):
 class CommunityServiceSettings(BaseSettings):
     base_url: str = Field(..., validation_alias='COMMUNITY_BASE_URL')
     port: int = Field(..., validation_alias='COMMUNITY_PORT')
+    # Несколько экземпляров сервиса: "host:port,host:port"; пусто — только base_url:port
+    instances: str = Field("", validation_alias='COMMUNITY_INSTANCES')
+    connect_timeout: float = Field(1.0, gt=0, validation_alias='COMMUNITY_CONNECT_TIMEOUT')
+    read_timeout: float = Field(10.0, gt=0, validation_alias='COMMUNITY_READ_TIMEOUT')
+    breaker_failure_threshold: int = Field(5, ge=0, validation_alias='COMMUNITY_BREAKER_FAILURE_THRESHOLD')
+    breaker_reset_timeout: float = Field(15.0, gt=0, validation_alias='COMMUNITY_BREAKER_RESET_TIMEOUT')
+    retry_attempts: int = Field(2, ge=0, validation_alias='COMMUNITY_RETRY_ATTEMPTS')
+    retry_budget_ratio: float = Field(0.1, ge=0, validation_alias='COMMUNITY_RETRY_BUDGET_RATIO')
+    concurrency_initial: int = Field(50, gt=0, validation_alias='COMMUNITY_CONCURRENCY_INITIAL')
+    concurrency_min: int = Field(5, gt=0, validation_alias='COMMUNITY_CONCURRENCY_MIN')
+    concurrency_max: int = Field(200, gt=0, validation_alias='COMMUNITY_CONCURRENCY_MAX')
+    concurrency_latency_tolerance: float = Field(2.0, gt=1, validation_alias='COMMUNITY_CONCURRENCY_LATENCY_TOLERANCE')
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
 
+
+class UpstreamPoolSettings(BaseSettings):
+    limit: int = Field(100, ge=0, validation_alias='UPSTREAM_POOL_LIMIT')
+    limit_per_host: int = Field(50, ge=0, validation_alias='UPSTREAM_POOL_LIMIT_PER_HOST')
+    # Сколько запрос ждет свободного соединения в пуле; не считается сбоем сервиса
+    pool_wait_timeout: float = Field(5.0, gt=0, validation_alias='UPSTREAM_POOL_WAIT_TIMEOUT')
+    keepalive_timeout: float = Field(30.0, gt=0, validation_alias='UPSTREAM_KEEPALIVE_TIMEOUT')
+    dns_cache_ttl: int = Field(300, ge=0, validation_alias='UPSTREAM_DNS_CACHE_TTL')
+    coalesce_gets: bool = Field(True, validation_alias='UPSTREAM_COALESCE_GETS')
+    adaptive_concurrency: bool = Field(True, validation_alias='UPSTREAM_ADAPTIVE_CONCURRENCY')
+    # Доля лимита параллельности, доступная маршрутам обычного и низкого приоритета
+    normal_priority_share: float = Field(0.9, gt=0, le=1, validation_alias='UPSTREAM_NORMAL_PRIORITY_SHARE')
+    low_priority_share: float = Field(0.7, gt=0, le=1, validation_alias='UPSTREAM_LOW_PRIORITY_SHARE')
+    balancer: Literal["p2c", "least_outstanding"] = Field("p2c", validation_alias='UPSTREAM_BALANCER')
+    eject_failures: int = Field(3, ge=0, validation_alias='UPSTREAM_EJECT_FAILURES')
+    eject_duration: float = Field(10.0, gt=0, validation_alias='UPSTREAM_EJECT_DURATION')
+    health_check_path: str = Field("", validation_alias='UPSTREAM_HEALTH_CHECK_PATH')
+    health_check_interval: float = Field(5.0, gt=0, validation_alias='UPSTREAM_HEALTH_CHECK_INTERVAL')
+    # Дублирование медленных GET (hedging): второй запрос уходит, если первый дольше перцентиля.
+    # Помогает, только если медленных ответов меньше (100 - percentile)% — иначе перцентиль
+    # и есть медленный ответ и дубль опаздывает — и меньше budget_ratio, иначе кончается бюджет
+    hedge_enabled: bool = Field(False, validation_alias='UPSTREAM_HEDGE_ENABLED')
+    hedge_percentile: float = Field(95.0, gt=0, lt=100, validation_alias='UPSTREAM_HEDGE_PERCENTILE')
+    hedge_min_delay: float = Field(0.01, ge=0, validation_alias='UPSTREAM_HEDGE_MIN_DELAY')
+    hedge_budget_ratio: float = Field(0.05, ge=0, validation_alias='UPSTREAM_HEDGE_BUDGET_RATIO')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
+class ResponseCacheSettings(BaseSettings):
+    maxsize: int = Field(1024, ge=0, validation_alias='RESPONSE_CACHE_SIZE')
+    permission_ttl: float = Field(300.0, ge=0, validation_alias='PERMISSION_CACHE_TTL')
+    permission_stale_ttl: float = Field(600.0, ge=0, validation_alias='PERMISSION_CACHE_STALE_TTL')
+    location_ttl: float = Field(60.0, ge=0, validation_alias='LOCATION_CACHE_TTL')
+    profile_ttl: float = Field(30.0, ge=0, validation_alias='PROFILE_CACHE_TTL')
+    search_ttl: float = Field(10.0, ge=0, validation_alias='SEARCH_CACHE_TTL')
+    not_found_ttl: float = Field(5.0, ge=0, validation_alias='NOT_FOUND_CACHE_TTL')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
+class UploadSettings(BaseSettings):
+    max_request_bytes: int = Field(10 * 1024 * 1024, gt=0, validation_alias='UPLOAD_MAX_REQUEST_BYTES')
+    inflight_budget_bytes: int = Field(200 * 1024 * 1024, gt=0, validation_alias='UPLOAD_INFLIGHT_BUDGET_BYTES')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
+class BatchSettings(BaseSettings):
+    max_items: int = Field(20, gt=0, validation_alias='BATCH_MAX_ITEMS')
+    concurrency: int = Field(4, gt=0, validation_alias='BATCH_CONCURRENCY')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
+class BulkLookupSettings(BaseSettings):
+    max_ids: int = Field(100, gt=0, validation_alias='BULK_LOOKUP_MAX_IDS')
+    concurrency: int = Field(8, gt=0, validation_alias='BULK_LOOKUP_CONCURRENCY')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
+class RateLimitSettings(BaseSettings):
+    enabled: bool = Field(True, validation_alias='RATE_LIMIT_ENABLED')
+    max_keys: int = Field(100000, gt=0, validation_alias='RATE_LIMIT_MAX_KEYS')
+    shards: int = Field(64, gt=0, validation_alias='RATE_LIMIT_SHARDS')
+    # Группы маршрутов: скорость (запросов в секунду) и запас корзины
+    auth_rate: float = Field(5.0, ge=0, validation_alias='RATE_LIMIT_AUTH_RATE')
+    auth_burst: int = Field(20, ge=0, validation_alias='RATE_LIMIT_AUTH_BURST')
+    profile_rate: float = Field(20.0, ge=0, validation_alias='RATE_LIMIT_PROFILE_RATE')
+    profile_burst: int = Field(40, ge=0, validation_alias='RATE_LIMIT_PROFILE_BURST')
+    community_rate: float = Field(50.0, ge=0, validation_alias='RATE_LIMIT_COMMUNITY_RATE')
+    community_burst: int = Field(100, ge=0, validation_alias='RATE_LIMIT_COMMUNITY_BURST')
+    batch_rate: float = Field(5.0, ge=0, validation_alias='RATE_LIMIT_BATCH_RATE')
+    batch_burst: int = Field(10, ge=0, validation_alias='RATE_LIMIT_BATCH_BURST')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
+class MetricsSettings(BaseSettings):
+    # /metrics раскрывает адреса экземпляров, состояние предохранителей и кэшей: по умолчанию выключен
+    enabled: bool = Field(False, validation_alias='METRICS_ENABLED')
+    # Bearer-токен для GET /metrics (authorization в scrape_config Prometheus); пусто — без проверки
+    token: str = Field("", validation_alias='METRICS_TOKEN')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
+class ServerTimingSettings(BaseSettings):
+    enabled: bool = Field(False, validation_alias='SERVER_TIMING_ENABLED')
+    # Доля запросов, разбивка которых пишется в лог gateway.timing (0 — не писать)
+    log_sample_rate: float = Field(0.0, ge=0, le=1, validation_alias='SERVER_TIMING_LOG_SAMPLE_RATE')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
+class ProfilerSettings(BaseSettings):
+    # Секрет для заголовка X-Profiler-Token; пусто — профилировщик выключен
+    token: str = Field("", validation_alias='PROFILER_TOKEN')
+    interval: float = Field(0.005, gt=0, validation_alias='PROFILER_INTERVAL')
+    max_seconds: float = Field(60.0, gt=0, validation_alias='PROFILER_MAX_SECONDS')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
+class CaptureSettings(BaseSettings):
+    # JSONL-файл для записи трафика; пусто — запись выключена
+    file: str = Field("", validation_alias='CAPTURE_FILE')
+    sample_rate: float = Field(0.1, ge=0, le=1, validation_alias='CAPTURE_SAMPLE_RATE')
+    batch_size: int = Field(500, gt=0, validation_alias='CAPTURE_BATCH_SIZE')
+    flush_interval: float = Field(1.0, gt=0, validation_alias='CAPTURE_FLUSH_INTERVAL')
+    # Сколько записей может ждать диска; сверх этого записи отбрасываются
+    max_pending: int = Field(10000, gt=0, validation_alias='CAPTURE_MAX_PENDING')
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
+
+
 class Settings(BaseSettings):
     jwt_settings: JWTSettings = JWTSettings()
     auth_service_settings: AuthServiceSettings = AuthServiceSettings()
     personal_account_service_settings: PersonalAccountServiceSettings = PersonalAccountServiceSettings()
     community_service_settings: CommunityServiceSettings = CommunityServiceSettings()
+    upstream_pool_settings: UpstreamPoolSettings = UpstreamPoolSettings()
+    response_cache_settings: ResponseCacheSettings = ResponseCacheSettings()
+    upload_settings: UploadSettings = UploadSettings()
+    batch_settings: BatchSettings = BatchSettings()
+    bulk_lookup_settings: BulkLookupSettings = BulkLookupSettings()
+    rate_limit_settings: RateLimitSettings = RateLimitSettings()
+    metrics_settings: MetricsSettings = MetricsSettings()
+    server_timing_settings: ServerTimingSettings = ServerTimingSettings()
+    profiler_settings: ProfilerSettings = ProfilerSettings()
+    capture_settings: CaptureSettings = CaptureSettings()
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
 
@@ -0,0 +1,33 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._forget(key, done))
+
+        # shield: отмена одного из ожидающих не должна отменять общий запрос
+        return await asyncio.shield(call)
+
+    def forget_matching(self, predicate: Callable[[Hashable], bool]):
+        # Уже ожидающие получат результат текущего запроса, новые вызовы начнут свой.
+        # Нужно после записи: запрос, начатый до нее, может вернуть устаревший ответ
+        for key in [key for key in self._calls if predicate(key)]:
+            del self._calls[key]
+
+    def _forget(self, key: Hashable, call: asyncio.Future):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            # Ошибку уже получили ожидающие; помечаем ее как обработанную
+            call.exception()
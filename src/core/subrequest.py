@@ -0,0 +1,82 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from starlette.types import ASGIApp, Message, Scope
+
+# Отметка в scope запроса, выполненного через dispatch(), а не пришедшего от клиента
+SUBREQUEST_SCOPE_KEY = "gateway.subrequest"
+
+
+@dataclass(frozen=True)
+class SubResponse:
+    status: int
+    content_type: str
+    body: bytes
+
+
+async def dispatch(app: ASGIApp, parent_scope: Scope, method: str, target: str,
+                   headers: Iterable[Tuple[bytes, bytes]] = (), body: bytes = b"") -> SubResponse:
+    # Выполняет запрос к маршруту шлюза внутри процесса, минуя сеть и HTTP-парсер
+    url = urlsplit(target)
+    scope = {
+        "type": "http",
+        "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+        "http_version": parent_scope.get("http_version", "1.1"),
+        "method": method.upper(),
+        "scheme": parent_scope.get("scheme", "http"),
+        "path": url.path,
+        "raw_path": url.path.encode("utf-8"),
+        "query_string": url.query.encode("latin-1"),
+        "root_path": "",
+        "headers": list(headers) + [(b"content-length", str(len(body)).encode())],
+        "client": parent_scope.get("client"),
+        "server": parent_scope.get("server"),
+        SUBREQUEST_SCOPE_KEY: True,
+    }
+
+    request_sent = False
+    response_complete = asyncio.Event()
+    status = 500
+    content_type = ""
+    chunks: List[bytes] = []
+
+    async def receive() -> Message:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Дальше только ждем завершения ответа, чтобы StreamingResponse не счел клиента отключившимся
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-type":
+                    content_type = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        response_complete.set()
+
+    return SubResponse(status=status, content_type=content_type, body=b"".join(chunks))
+
+
+def is_subrequest(scope: Scope) -> bool:
+    return scope.get(SUBREQUEST_SCOPE_KEY, False)
+
+
+def header(scope: Scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value
+    return None
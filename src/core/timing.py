@@ -0,0 +1,96 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, Tuple
+
+PHASE_JWT = "jwt"
+PHASE_UPSTREAM_CONNECT = "upstream-connect"
+# Фазы не пересекаются: upstream-wait — ожидание пула и заголовков ответа без upstream-connect
+PHASE_UPSTREAM_WAIT = "upstream-wait"
+PHASE_UPSTREAM_BODY = "upstream-body"
+PHASE_DTO = "dto"
+PHASE_SERIALIZE = "serialize"
+PHASE_TOTAL = "total"
+
+
+class RequestTimings:
+    __slots__ = ("spans",)
+
+    def __init__(self):
+        # Фаза -> интервалы (начало, конец) по perf_counter
+        self.spans: Dict[str, List[Tuple[float, float]]] = {}
+
+    def add(self, name: str, started: float, ended: float):
+        self.spans.setdefault(name, []).append((started, ended))
+
+    def merge(self, other: "RequestTimings", since: float = float("-inf")):
+        # Интервалы другого запроса, обрезанные по моменту since (когда к нему присоединились)
+        for name, spans in other.spans.items():
+            for started, ended in spans:
+                if ended > since:
+                    self.add(name, max(started, since), ended)
+
+    @property
+    def phases(self) -> Dict[str, float]:
+        # Фаза -> время в секундах по часам: параллельные запросы к сервисам не складываются,
+        # пересекающиеся интервалы объединяются, поэтому фаза не длиннее всего запроса
+        return {name: _covered(spans) for name, spans in self.spans.items()}
+
+    def server_timing(self, total: float) -> str:
+        metrics = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.phases.items()]
+        metrics.append(f"{PHASE_TOTAL};dur={total * 1000:.3f}")
+        return ", ".join(metrics)
+
+
+# Замеры текущего запроса; None — замеры выключены и record()/phase() ничего не делают
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def _covered(spans: List[Tuple[float, float]]) -> float:
+    covered = 0.0
+    current_start = current_end = None
+    for started, ended in sorted(spans):
+        if current_end is None or started > current_end:
+            if current_end is not None:
+                covered += current_end - current_start
+            current_start, current_end = started, ended
+        else:
+            current_end = max(current_end, ended)
+    if current_end is not None:
+        covered += current_end - current_start
+    return covered
+
+
+def record(name: str, started: float, ended: float):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, started, ended)
+
+
+def record_timings(timings: RequestTimings, since: float = float("-inf")):
+    current = current_timings.get()
+    if current is not None:
+        current.merge(timings, since)
+
+
+async def collect_timings(call: Awaitable[Any]) -> Tuple[Any, RequestTimings]:
+    # Замеры попытки собираются отдельно: дубль-проигравший не попадает в запрос,
+    # а общий запрос single-flight делится со всеми ожидающими.
+    # Должна выполняться в собственной задаче, как и collect_upstreams
+    timings = RequestTimings()
+    current_timings.set(timings)
+    return await call, timings
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, started, time.perf_counter())
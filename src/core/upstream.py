@@ -0,0 +1,474 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Union
+
+import aiohttp
+from fastapi import HTTPException
+from multidict import CIMultiDictProxy
+from starlette import status
+
+from core import json_codec
+from core.balancer import Instance, LoadBalancer
+from core.capture import collect_upstreams, record_upstream
+from core.concurrency import AdaptiveConcurrencyLimiter, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from core.hedging import LatencyWindow
+from core.metrics import UPSTREAM_CONNECT, UPSTREAM_DURATION, UPSTREAM_WAIT, registry, status_class
+from core.resilience import CircuitBreaker, RetryBudget, STATE_CLOSED
+from core.settings import settings, UpstreamPoolSettings, AuthServiceSettings, PersonalAccountServiceSettings, \
+    CommunityServiceSettings
+from core.singleflight import SingleFlight
+from core.timing import collect_timings, record, record_timings, PHASE_UPSTREAM_BODY, PHASE_UPSTREAM_CONNECT, PHASE_UPSTREAM_WAIT
+
+ServiceSettings = Union[AuthServiceSettings, PersonalAccountServiceSettings, CommunityServiceSettings]
+
+RETRYABLE_STATUSES = frozenset({502, 503, 504})
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class UpstreamResponse:
+    status: int
+    reason: Optional[str]
+    content_type: str
+    headers: CIMultiDictProxy
+    body: bytes
+
+    def json(self) -> Any:
+        return json_codec.loads(self.body)
+
+
+class Upstream:
+    def __init__(self, name: str, service_settings: ServiceSettings, pool_settings: UpstreamPoolSettings,
+                 coalesce_gets: bool = False):
+        self.name = name
+        addresses = [address.strip() for address in service_settings.instances.split(",") if address.strip()]
+        self.balancer = LoadBalancer(
+            [f"http://{address}" for address in addresses or [f"{service_settings.base_url}:{service_settings.port}"]],
+            strategy=pool_settings.balancer,
+            eject_failures=pool_settings.eject_failures,
+            eject_duration=pool_settings.eject_duration,
+        )
+        self.coalesce_gets = coalesce_gets
+        self.retry_attempts = service_settings.retry_attempts
+        self.breaker = CircuitBreaker(
+            failure_threshold=service_settings.breaker_failure_threshold,
+            reset_timeout=service_settings.breaker_reset_timeout,
+        )
+        self.retry_budget = RetryBudget(ratio=service_settings.retry_budget_ratio)
+        self.limiter: Optional[AdaptiveConcurrencyLimiter] = None
+        if pool_settings.adaptive_concurrency:
+            capacity = _pool_capacity(service_settings.concurrency_max, pool_settings, len(self.balancer.instances))
+            self.limiter = AdaptiveConcurrencyLimiter(
+                initial=service_settings.concurrency_initial,
+                min_limit=min(service_settings.concurrency_min, capacity),
+                max_limit=capacity,
+                tolerance=service_settings.concurrency_latency_tolerance,
+            )
+        self.hedging = pool_settings.hedge_enabled
+        self.hedge_budget = RetryBudget(ratio=pool_settings.hedge_budget_ratio)
+        # Окна задержек по маршрутам: у поиска и у выборки по ID разные "нормальные" задержки
+        self.latencies: Dict[str, LatencyWindow] = {}
+        self.hedged = 0
+        self._priority_shares = {
+            PRIORITY_LOW: pool_settings.low_priority_share,
+            PRIORITY_NORMAL: pool_settings.normal_priority_share,
+            PRIORITY_HIGH: 1.0,
+        }
+        # connect в aiohttp включает ожидание свободного соединения в пуле, поэтому
+        # установка TCP-соединения ограничивается отдельно через sock_connect
+        self._timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=pool_settings.pool_wait_timeout + service_settings.connect_timeout,
+            sock_connect=service_settings.connect_timeout,
+            sock_read=service_settings.read_timeout,
+        )
+        self._pool_settings = pool_settings
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._inflight = SingleFlight()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError(f"Upstream '{self.name}' is not started")
+        return self._session
+
+    async def start(self):
+        if self._session is not None and not self._session.closed:
+            return
+
+        # Один пул соединений на сервис (лимит на хост — на каждый экземпляр):
+        # keep-alive и кэш DNS переживают отдельные запросы
+        connector = aiohttp.TCPConnector(
+            limit=self._pool_settings.limit,
+            limit_per_host=self._pool_settings.limit_per_host,
+            keepalive_timeout=self._pool_settings.keepalive_timeout,
+            use_dns_cache=self._pool_settings.dns_cache_ttl > 0,
+            ttl_dns_cache=self._pool_settings.dns_cache_ttl or None,
+            ssl=False,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector, timeout=self._timeout, trace_configs=[self._trace_config()],
+        )
+
+        if self._pool_settings.health_check_path and len(self.balancer.instances) > 1:
+            self._health_task = asyncio.get_running_loop().create_task(self._check_health())
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def pool_stats(self) -> dict:
+        # Публичного API занятости пула у aiohttp нет, читаем состояние коннектора
+        if self._session is None or self._session.closed:
+            return {"in_use": 0, "waiters": 0}
+        connector = self._session.connector
+        return {
+            "in_use": len(connector._acquired),
+            "waiters": sum(len(waiters) for waiters in connector._waiters.values()),
+        }
+
+    async def open(self, method: str, path: str, *, priority: int = PRIORITY_NORMAL, hedge: Optional[str] = None,
+                   **kwargs) -> aiohttp.ClientResponse:
+        # Ответ не вычитывается: освободить соединение должен вызывающий (response.release()).
+        # Потоковый ответ не дублируется, hedge игнорируется
+        return await self._send(method, path, read=False, priority=priority, **kwargs)
+
+    async def fetch(self, method: str, path: str, *, params: Optional[Mapping[str, Any]] = None,
+                    priority: int = PRIORITY_NORMAL, hedge: Optional[str] = None, **kwargs) -> UpstreamResponse:
+        if method != "GET" or not self.coalesce_gets:
+            return await self._send(method, path, read=True, priority=priority, hedge=hedge, params=params, **kwargs)
+
+        # Одинаковые параллельные GET делят один запрос к сервису и его результат
+        key = (method, path, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        joined = time.perf_counter()
+        (response, timings), upstreams = await self._inflight.do(
+            key, lambda: collect_upstreams(collect_timings(
+                self._send(method, path, read=True, priority=priority, hedge=hedge, params=params, **kwargs)
+            ))
+        )
+        for name, upstream_status in upstreams:
+            record_upstream(name, upstream_status)
+        # Присоединившийся позже получает фазы общего запроса начиная с момента, когда стал ждать
+        record_timings(timings, since=joined)
+        return response
+
+    def forget_inflight(self, path: str):
+        # Следующие GET по этому пути не присоединяются к запросам, начатым до записи
+        self._inflight.forget_matching(lambda key: key[1] == path)
+
+    async def _send(self, method: str, path: str, read: bool, priority: int, hedge: Optional[str] = None, **kwargs):
+        # hedge — ключ маршрута для окна задержек; None — дублировать нельзя
+        if not (read and method == "GET" and self.hedging):
+            hedge = None
+        retries = self.retry_attempts if method == "GET" else 0
+        self.retry_budget.deposit()
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Сервис {self.name} временно недоступен",
+                    headers={"Retry-After": str(self.breaker.retry_after())},
+                )
+
+            can_retry = attempt < retries
+            attempt += 1
+            try:
+                if hedge is not None:
+                    response = await self._hedged_attempt(method, path, priority, hedge, **kwargs)
+                else:
+                    response = await self._limited_attempt(method, path, read, priority, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                if isinstance(exc.__cause__, HTTPException):
+                    # Тело запроса отклонено на стороне шлюза (например, превышен лимит загрузки)
+                    raise exc.__cause__
+                self.breaker.record_failure()
+                if can_retry and self.retry_budget.withdraw():
+                    continue
+                if isinstance(exc, asyncio.TimeoutError):
+                    raise HTTPException(
+                        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                        detail=f"Сервис {self.name} не ответил вовремя",
+                    )
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"Ошибка соединения с сервисом {self.name}",
+                )
+
+            if response.status < 500:
+                self.breaker.record_success()
+                return response
+
+            self.breaker.record_failure()
+            if response.status in RETRYABLE_STATUSES and can_retry and self.retry_budget.withdraw():
+                if not read:
+                    response.release()
+                continue
+            return response
+
+    async def _hedged_attempt(self, method: str, path: str, priority: int, hedge: str,
+                              **kwargs) -> UpstreamResponse:
+        self.hedge_budget.deposit()
+        latencies = self.latencies.get(hedge)
+        if latencies is None:
+            latencies = self.latencies[hedge] = LatencyWindow()
+
+        async def timed_attempt():
+            started = time.monotonic()
+            response = await self._limited_attempt(method, path, True, priority, **kwargs)
+            if response.status < 500:
+                latencies.record(time.monotonic() - started)
+            return response
+
+        delay = latencies.percentile(self._pool_settings.hedge_percentile)
+        if delay is None:
+            return await timed_attempt()
+
+        # Фазы в Server-Timing берутся только у попытки, чей ответ возвращен
+        attempts = [asyncio.ensure_future(collect_timings(timed_attempt()))]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=max(delay, self._pool_settings.hedge_min_delay))
+            # Первый запрос не уложился в перцентиль: дублируем, если позволяет бюджет
+            if not done and self.hedge_budget.withdraw():
+                self.hedged += 1
+                attempts.append(asyncio.ensure_future(collect_timings(timed_attempt())))
+
+            # Берем первый успешный ответ; ошибка — только если не удались все попытки
+            error = None
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        response, timings = attempt.result()
+                        record_timings(timings)
+                        return response
+                    error = error or attempt.exception()
+            raise error
+        finally:
+            for attempt in attempts:
+                if not attempt.done():
+                    attempt.cancel()
+                attempt.add_done_callback(_consume_exception)
+
+    async def _limited_attempt(self, method: str, path: str, read: bool, priority: int, **kwargs):
+        if self.limiter is None:
+            return await self._attempt(method, path, read, **kwargs)
+
+        # Сверх лимита сразу отвечаем 503, а не копим очередь в цикле событий
+        if not self.limiter.try_acquire(self._priority_shares.get(priority, 1.0)):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Сервис {self.name} перегружен",
+                headers={"Retry-After": "1"},
+            )
+
+        started = time.monotonic()
+        latency = None
+        failed = True
+        try:
+            response = await self._attempt(method, path, read, **kwargs)
+            latency = time.monotonic() - started
+            failed = response.status >= 500
+            return response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            if not isinstance(exc.__cause__, HTTPException):
+                latency = time.monotonic() - started
+            raise
+        finally:
+            self.limiter.release(latency, failed)
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        labels = (self.name,)
+
+        async def on_connection_create_start(session, context, params):
+            context.connect_started = time.perf_counter()
+            if context.trace_request_ctx is not None:
+                context.trace_request_ctx.connect_started = context.connect_started
+
+        async def on_connection_create_end(session, context, params):
+            connect_ended = time.perf_counter()
+            UPSTREAM_CONNECT.observe(labels, connect_ended - context.connect_started)
+            record(PHASE_UPSTREAM_CONNECT, context.connect_started, connect_ended)
+            if context.trace_request_ctx is not None:
+                context.trace_request_ctx.connect_ended = connect_ended
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
+    async def _attempt(self, method: str, path: str, read: bool, **kwargs):
+        # Каждая попытка (в том числе повтор и дубль) заново выбирает экземпляр
+        instance = self.balancer.pick()
+        instance.outstanding += 1
+        started = time.perf_counter()
+        connection = _ConnectionTrace()
+        try:
+            response = await self._request(instance, method, path, read, started, connection, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            if isinstance(exc, aiohttp.ConnectionTimeoutError) and connection.connect_started is None:
+                # Не дождались соединения из пула: сервис исправен, перегружен сам шлюз
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Нет свободных соединений с сервисом {self.name}",
+                    headers={"Retry-After": "1"},
+                ) from exc
+            if not isinstance(exc.__cause__, HTTPException):
+                self.balancer.record_failure(instance)
+                UPSTREAM_DURATION.observe((self.name, "error"), time.perf_counter() - started)
+            raise
+        finally:
+            # Для потокового ответа экземпляр считается свободным после получения заголовков
+            instance.outstanding -= 1
+
+        UPSTREAM_DURATION.observe((self.name, status_class(response.status)), time.perf_counter() - started)
+        record_upstream(self.name, response.status)
+
+        if response.status in RETRYABLE_STATUSES:
+            self.balancer.record_failure(instance)
+        else:
+            self.balancer.record_success(instance)
+        return response
+
+    async def _request(self, instance: Instance, method: str, path: str, read: bool, started: float,
+                       connection: "_ConnectionTrace", **kwargs):
+        response = await self.session.request(method, instance.base_url + path, trace_request_ctx=connection,
+                                              **kwargs)
+        headers_received = time.perf_counter()
+        UPSTREAM_WAIT.observe((self.name,), headers_received - started)
+        # Фазы Server-Timing не пересекаются: время установки соединения уже в upstream-connect
+        if connection.connect_ended is None:
+            record(PHASE_UPSTREAM_WAIT, started, headers_received)
+        else:
+            record(PHASE_UPSTREAM_WAIT, started, connection.connect_started)
+            record(PHASE_UPSTREAM_WAIT, connection.connect_ended, headers_received)
+        if not read:
+            return response
+
+        try:
+            body = await response.read()
+            record(PHASE_UPSTREAM_BODY, headers_received, time.perf_counter())
+            return UpstreamResponse(
+                status=response.status,
+                reason=response.reason,
+                content_type=response.content_type,
+                headers=response.headers,
+                body=body,
+            )
+        finally:
+            response.release()
+
+    async def _check_health(self):
+        while True:
+            await asyncio.sleep(self._pool_settings.health_check_interval)
+            await asyncio.gather(*(self._probe(instance) for instance in self.balancer.instances))
+
+    async def _probe(self, instance: Instance):
+        url = instance.base_url + self._pool_settings.health_check_path
+        timeout = aiohttp.ClientTimeout(total=self._timeout.sock_connect + self._timeout.sock_read)
+        try:
+            async with self.session.get(url, timeout=timeout) as response:
+                healthy = response.status < 500
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            healthy = False
+
+        if healthy != instance.healthy:
+            logger.warning("Upstream %s instance %s is %s", self.name, instance.base_url,
+                           "healthy" if healthy else "unhealthy")
+        instance.healthy = healthy
+
+
+class _ConnectionTrace:
+    # Отмечает, дошел ли запрос до установки нового соединения или еще ждал пул,
+    # и когда установка началась и закончилась
+    __slots__ = ("connect_started", "connect_ended")
+
+    def __init__(self):
+        self.connect_started: Optional[float] = None
+        self.connect_ended: Optional[float] = None
+
+
+def _pool_capacity(max_limit: int, pool_settings: UpstreamPoolSettings, instances: int) -> int:
+    # Лимит параллельности не выше размера пула: лишние запросы получают быстрый 503
+    # от лимитера, а не копятся в очереди пула до таймаута
+    capacity = max_limit
+    if pool_settings.limit_per_host:
+        capacity = min(capacity, pool_settings.limit_per_host * instances)
+    if pool_settings.limit:
+        capacity = min(capacity, pool_settings.limit)
+    return capacity
+
+
+def _consume_exception(attempt: asyncio.Future):
+    if not attempt.cancelled():
+        attempt.exception()
+
+
+class UpstreamClients:
+    def __init__(self, pool_settings: UpstreamPoolSettings = settings.upstream_pool_settings):
+        self.auth = Upstream("auth", settings.auth_service_settings, pool_settings)
+        self.personal_account = Upstream(
+            "personal_account",
+            settings.personal_account_service_settings,
+            pool_settings,
+            coalesce_gets=pool_settings.coalesce_gets,
+        )
+        self.community = Upstream(
+            "community",
+            settings.community_service_settings,
+            pool_settings,
+            coalesce_gets=pool_settings.coalesce_gets,
+        )
+
+    def __iter__(self):
+        return iter((self.auth, self.personal_account, self.community))
+
+    def register_metrics(self):
+        registry.collect(
+            "gateway_upstream_outstanding_requests", "gauge", "Requests in flight per upstream instance",
+            lambda: (({"upstream": upstream.name, "instance": instance.base_url}, instance.outstanding)
+                     for upstream in self for instance in upstream.balancer.instances),
+        )
+        registry.collect(
+            "gateway_upstream_pool_limit", "gauge", "Connection pool limit per upstream instance",
+            lambda: (({"upstream": upstream.name}, upstream._pool_settings.limit_per_host) for upstream in self),
+        )
+        registry.collect(
+            "gateway_upstream_pool_in_use", "gauge", "Connections currently acquired from the upstream pool",
+            lambda: (({"upstream": upstream.name}, upstream.pool_stats()["in_use"]) for upstream in self),
+        )
+        registry.collect(
+            "gateway_upstream_pool_waiters", "gauge", "Requests waiting for a free connection in the upstream pool",
+            lambda: (({"upstream": upstream.name}, upstream.pool_stats()["waiters"]) for upstream in self),
+        )
+        registry.collect(
+            "gateway_upstream_concurrency_limit", "gauge", "Current adaptive concurrency limit",
+            lambda: (({"upstream": upstream.name}, upstream.limiter.limit)
+                     for upstream in self if upstream.limiter is not None),
+        )
+        registry.collect(
+            "gateway_upstream_breaker_open", "gauge", "1 if the upstream circuit breaker is not closed",
+            lambda: (({"upstream": upstream.name}, int(upstream.breaker.state != STATE_CLOSED)) for upstream in self),
+        )
+
+    async def start(self):
+        for upstream in self:
+            await upstream.start()
+
+    async def close(self):
+        for upstream in self:
+            await upstream.close()
@@ -0,0 +1,29 @@
+import secrets
+from typing import Annotated, Optional
+
+from fastapi import Header, HTTPException
+from starlette import status
+
+from core.settings import settings
+
+
+async def verify_profiler_token(x_profiler_token: Annotated[Optional[str], Header()] = None):
+    expected = settings.profiler_settings.token
+    if not expected or not x_profiler_token or not secrets.compare_digest(x_profiler_token, expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступ запрещен",
+        )
+
+
+async def verify_metrics_token(authorization: Annotated[Optional[str], Header()] = None):
+    expected = settings.metrics_settings.token
+    if not expected:
+        return
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступ запрещен",
+        )
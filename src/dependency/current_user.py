@@ -3,27 +3,41 @@ from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from starlette import status
+from core.jwt_cache import VerifiedTokenCache
+from core.metrics import register_cache
 from core.settings import settings
+from core.timing import phase, PHASE_JWT
 
 bearer_scheme = HTTPBearer(auto_error=False)
+token_cache = VerifiedTokenCache(
+    maxsize=settings.jwt_settings.cache_size,
+    max_ttl=settings.jwt_settings.cache_max_ttl,
+)
+register_cache("jwt", token_cache)
 
 async def get_user_from_token(
         token: Annotated[Optional[HTTPAuthorizationCredentials], Depends(bearer_scheme)],
 ):
-    try:
-        if not token:
+    with phase(PHASE_JWT):
+        try:
+            if not token:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Could not validate credentials",
+                )
+            payload = token_cache.get(token.credentials)
+            if payload is not None:
+                return payload
+
+            # Декодируем и проверяем токен с использованием секретного ключа и алгоритма
+            payload = jwt.decode(token.credentials, settings.jwt_settings.secret_key,
+                                 algorithms=[settings.jwt_settings.algorithm])
+            token_cache.put(token.credentials, payload)
+            return payload
+
+        except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
+                detail="Not logged in or Invalid credentials",
+                headers={"WWW-Authenticate": "Bearer"},
             )
-        # Декодируем и проверяем токен с использованием секретного ключа и алгоритма
-        payload = jwt.decode(token.credentials, settings.jwt_settings.secret_key,
-                             algorithms=[settings.jwt_settings.algorithm])
-        return payload
-
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not logged in or Invalid credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
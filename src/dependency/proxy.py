@@ -0,0 +1,7 @@
+from fastapi import Request
+
+from core.proxy import ProxyEngine
+
+
+async def get_proxy_engine(request: Request) -> ProxyEngine:
+    return request.app.state.proxy
@@ -0,0 +1,50 @@
+import math
+from typing import Annotated, Callable, Hashable
+
+from fastapi import Depends, HTTPException, Request
+from starlette import status
+
+from core.rate_limit import TokenBucketLimiter
+from core.settings import settings
+from dependency.current_user import get_user_from_token
+
+RATE_LIMIT_GROUPS = ("auth", "profile", "community", "batch")
+
+limiters = {
+    group: TokenBucketLimiter(
+        rate=getattr(settings.rate_limit_settings, f"{group}_rate"),
+        burst=getattr(settings.rate_limit_settings, f"{group}_burst"),
+        max_keys=settings.rate_limit_settings.max_keys,
+        shards=settings.rate_limit_settings.shards,
+    )
+    for group in RATE_LIMIT_GROUPS
+}
+
+
+def _check(group: str, key: Hashable):
+    if not settings.rate_limit_settings.enabled:
+        return
+
+    retry_after = limiters[group].acquire(key)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много запросов",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+def limit_by_user(group: str) -> Callable:
+    async def dependency(current_user: Annotated[dict, Depends(get_user_from_token)]):
+        _check(group, current_user.get("id"))
+
+    return dependency
+
+
+def limit_by_client_ip(group: str) -> Callable:
+    # Адрес клиента берется из scope: за прокси его подставляет uvicorn из X-Forwarded-For,
+    # если адрес прокси указан в FORWARDED_ALLOW_IPS (см. utils/start_api.sh)
+    async def dependency(request: Request):
+        _check(group, request.client.host if request.client else None)
+
+    return dependency
@@ -0,0 +1,80 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette import status
+from starlette.responses import Response
+
+from core import profiler
+from core.metrics import registry
+from core.settings import settings
+from dependency.admin import verify_metrics_token, verify_profiler_token
+
+monitoring_router = APIRouter(
+    tags=["Мониторинг"],
+    dependencies=[Depends(verify_metrics_token)],
+)
+
+profiler_router = APIRouter(
+    tags=["Мониторинг"],
+    dependencies=[Depends(verify_profiler_token)],
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@monitoring_router.get(
+    "/metrics",
+    summary="Метрики в формате Prometheus",
+    include_in_schema=False,
+)
+async def get_metrics():
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@profiler_router.post(
+    "/admin/profiler",
+    summary="Снять профиль работающего шлюза",
+    include_in_schema=False,
+)
+async def run_profiler(seconds: float = Query(10.0, gt=0, description="Длительность профилирования"),
+                       requests: int = Query(0, ge=0, description="Остановить после N подходящих запросов"),
+                       route: str = Query("", description="Префикс пути для подсчета запросов"),
+                       output: Literal["json", "collapsed"] = Query("json", description="Формат результата")):
+    if profiler.active_session is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Профилирование уже идет")
+
+    session = profiler.ProfileSession(
+        interval=settings.profiler_settings.interval,
+        max_requests=requests,
+        route_prefix=route,
+    )
+    profiler.active_session = session
+    try:
+        await session.run(min(seconds, settings.profiler_settings.max_seconds))
+    finally:
+        profiler.active_session = None
+
+    if output == "collapsed":
+        # Сводка по задержке цикла событий — в заголовках: комментарии в теле ломают
+        # инструменты, читающие collapsed-формат (flamegraph.pl, speedscope)
+        lag = session.loop_lag_summary()
+        return Response(
+            content=session.collapsed(),
+            media_type="text/plain; charset=utf-8",
+            headers={
+                "Content-Disposition": 'attachment; filename="gateway.collapsed"',
+                "X-Profiler-Duration": f"{session.duration:.3f}",
+                "X-Profiler-Samples": str(session.samples),
+                "X-Profiler-Requests-Matched": str(session.requests_matched),
+                "X-Event-Loop-Lag": "; ".join(f"{name}={value}" for name, value in lag.items()),
+            },
+        )
+
+    return {
+        "duration_s": round(session.duration, 3),
+        "interval_s": session.interval,
+        "samples": session.samples,
+        "requests_matched": session.requests_matched,
+        "event_loop_lag": session.loop_lag_summary(),
+        "stacks": session.collapsed(),
+    }
@@ -2,84 +2,121 @@ import aiohttp
 from typing import Annotated
 
 from starlette import status
-from fastapi import APIRouter, HTTPException, Depends, Form, UploadFile, File
+from fastapi import APIRouter, Depends, Request
+from starlette.responses import Response
 from dependency.current_user import get_user_from_token
-from personal_account.dto import PersonalAccountResponse
+from dependency.proxy import get_proxy_engine
+from dependency.rate_limit import limit_by_user
+from personal_account import routes
+from personal_account.dto import PersonalAccountResponse, PersonalAccountPartialUpdateForm
+from core import json_codec
+from core.metrics import register_cache
+from core.multipart import MultipartRelay, UploadBudget
+from core.proxy import ProxyEngine
+from core.response_cache import ResponseCache, CachedResponse, make_etag, etag_matches
 from core.settings import settings
 
 pa_router = APIRouter(
     tags=["Личный кабинет пользователя"],
+    dependencies=[Depends(limit_by_user("profile"))],
 )
 
+# Поля формы шлюза -> поля сервиса личного кабинета
+PROFILE_FORM_FIELDS = {
+    "username": "username",
+    "first_name": "firstName",
+    "photo": "photo",
+}
+
+upload_budget = UploadBudget(settings.upload_settings.inflight_budget_bytes)
+
+profile_cache = ResponseCache(
+    ttl=settings.response_cache_settings.profile_ttl,
+    maxsize=settings.response_cache_settings.maxsize,
+)
+register_cache("profile", profile_cache)
+
+# Профиль персональный: разделяемые кэши его не хранят, клиент перепроверяет по ETag
+PROFILE_CACHE_CONTROL = "private, no-cache"
+
+
+def _cached_profile(profile: PersonalAccountResponse) -> CachedResponse:
+    body = json_codec.dumps(profile.model_dump(mode="json"))
+    return CachedResponse(body=body, status_code=status.HTTP_200_OK, etag=make_etag(body))
+
+
 @pa_router.get(
     "/profile",
     response_model=PersonalAccountResponse,
     status_code=status.HTTP_200_OK,
     summary="Возвращает информацию о пользователе"
 )
-async def send_request_to_profile_service(current_user: Annotated[dict, Depends(get_user_from_token)]):
+async def send_request_to_profile_service(request: Request,
+                                          current_user: Annotated[dict, Depends(get_user_from_token)],
+                                          proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
     user_id = current_user.get("id")
-    headers = {"Content-Type": "application/json"}
-
-    params = {}
-    params["userID"] = user_id
-
-    async with (aiohttp.ClientSession() as session):
-        async with session.get(url=f"http://{settings.personal_account_service_settings.base_url}:{settings.personal_account_service_settings.port}/profile",
-                                headers=headers, params=params, ssl=False) as response:
-            if response.status == 404:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=response.reason,
-                )
 
+    async def fetch_profile():
+        return _cached_profile(await proxy.call(routes.GET_PROFILE, user_id=user_id))
 
-            response = await response.json()
+    cached = await profile_cache.get_or_fetch(user_id, fetch_profile)
+    if etag_matches(request.headers.get("If-None-Match"), cached.etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": cached.etag, "Cache-Control": PROFILE_CACHE_CONTROL},
+        )
 
-            return PersonalAccountResponse(
-                id=response.get("id"),
-                username=response.get("username"),
-                first_name=response.get("firstName") if response.get("firstName") else None,
-                photo_url=response.get("photoUrl"),
-            )
+    response = cached.to_response()
+    response.headers["Cache-Control"] = PROFILE_CACHE_CONTROL
+    return response
 
 
 @pa_router.patch(
     "/profile",
     response_model=PersonalAccountResponse,
     status_code=status.HTTP_200_OK,
-    summary="Частичное обновление данных"
+    summary="Частичное обновление данных",
+    openapi_extra={
+        "requestBody": {
+            "content": {"multipart/form-data": {"schema": PersonalAccountPartialUpdateForm.model_json_schema()}},
+        },
+    },
 )
-async def send_request_to_profile_service_for_partial_update(current_user: Annotated[dict, Depends(get_user_from_token)],
-                                                             username: str = Form(None, description="Username пользователя"),
-                                                             first_name: str = Form(None, description="Имя пользователя"),
-                                                             photo: UploadFile = File(None, description="Фотография пользователя")):
-
+async def send_request_to_profile_service_for_partial_update(request: Request,
+                                                             current_user: Annotated[dict, Depends(get_user_from_token)],
+                                                             proxy: Annotated[ProxyEngine, Depends(get_proxy_engine)]):
     user_id = current_user.get("id")
-
-    form_data = aiohttp.FormData()
-    form_data.add_field("userID", str(user_id))
-
-    if username:
-        form_data.add_field("username", username)
-    if first_name:
-        form_data.add_field("firstName", first_name)
-    if photo:
-        form_data.add_field("photo", photo.file, filename=photo.filename, content_type=photo.content_type)
-
-    async with aiohttp.ClientSession() as session:
-        async with session.patch(url=f"http://{settings.personal_account_service_settings.base_url}:{settings.personal_account_service_settings.port}/profile", data=form_data, ssl=False) as response:
-            if response.status != 200:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail=response.content,
-                )
-
-            response = await response.json()
-
-            return PersonalAccountResponse(
-                id=response.get("id"),
-                username=response.get("username"),
-                first_name=response.get("firstName"),
-                photo_url=response.get("photoUrl"),
+    content_type = request.headers.get("Content-Type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        # Тело не читается целиком: части пересылаются в сервис по мере поступления
+        relay = MultipartRelay(
+            content_type,
+            fields=PROFILE_FORM_FIELDS,
+            extra_fields={"userID": str(user_id)},
+            max_bytes=settings.upload_settings.max_request_bytes,
+            budget=upload_budget,
+        )
+        try:
+            relay.reserve_declared(request.headers.get("Content-Length"))
+            profile = await proxy.call(
+                routes.UPDATE_PROFILE,
+                data=relay.body(request.stream()),
+                headers={"Content-Type": relay.content_type},
             )
+        finally:
+            relay.release()
+    else:
+        form = await request.form()
+        form_data = aiohttp.FormData()
+        form_data.add_field("userID", str(user_id))
+        for name, target in PROFILE_FORM_FIELDS.items():
+            value = form.get(name)
+            if value and isinstance(value, str):
+                form_data.add_field(target, value)
+
+        profile = await proxy.call(routes.UPDATE_PROFILE, data=form_data, headers={})
+
+    # Обновленный профиль сразу заменяет запись в кэше, следующий GET получит новый ETag
+    profile_cache.put(user_id, _cached_profile(profile))
+    return profile
@@ -15,3 +15,15 @@ class PersonalAccountResponse(BaseModel):
     photo_url: Optional[str] = Field(
         None, description="Ссылка на фотографию"
     )
+
+
+class PersonalAccountPartialUpdateForm(BaseModel):
+    username: str = Field(
+        None, description="Username пользователя"
+    )
+    first_name: str = Field(
+        None, description="Имя пользователя"
+    )
+    photo: bytes = Field(
+        None, description="Фотография пользователя"
+    )
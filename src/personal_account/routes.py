@@ -0,0 +1,30 @@
+from starlette import status
+
+from core.concurrency import PRIORITY_HIGH
+from core.proxy import ProxyRoute
+from personal_account.dto import PersonalAccountResponse
+
+
+def to_personal_account(response: dict) -> PersonalAccountResponse:
+    return PersonalAccountResponse(
+        id=response.get("id"),
+        username=response.get("username"),
+        first_name=response.get("firstName") if response.get("firstName") else None,
+        photo_url=response.get("photoUrl"),
+    )
+
+
+GET_PROFILE = ProxyRoute(
+    "GET", "/profile", "personal_account",
+    user_id_param="userID",
+    status_map={status.HTTP_404_NOT_FOUND: (None, None)},
+    response=to_personal_account,
+    priority=PRIORITY_HIGH,
+    hedge=True,
+)
+UPDATE_PROFILE = ProxyRoute(
+    "PATCH", "/profile", "personal_account",
+    error=(None, None),
+    response=to_personal_account,
+    priority=PRIORITY_HIGH,
+)
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Настройки читаются при импорте core.settings, поэтому обязательные переменные задаются до него
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+for prefix in ("AUTH", "PA", "COMMUNITY"):
+    os.environ.setdefault(f"{prefix}_BASE_URL", "127.0.0.1")
+    os.environ.setdefault(f"{prefix}_PORT", "1")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
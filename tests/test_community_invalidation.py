@@ -0,0 +1,203 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from fastapi import HTTPException
+
+from community import controller
+from community.dto import CommunityRequestDTO, CommunityResponseDTO
+from core.proxy import ProxyEngine
+from core.settings import CommunityServiceSettings, UpstreamPoolSettings
+from core.upstream import Upstream
+
+USER = {"id": 1}
+
+
+class Stall:
+    # Задерживает следующий GET до release; ответ строится по состоянию на момент прихода
+    def __init__(self):
+        self.armed = False
+        self.received = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        if self.armed:
+            self.armed = False
+            self.received.set()
+            await self.release.wait()
+
+
+async def community_service(community_id: int, location_id=None):
+    state = {"location_id": location_id, "communities": []}
+    stall = Stall()
+
+    def location(value: int) -> dict:
+        return {"id": 1, "locationType": "city", "locationId": value, "communityId": community_id}
+
+    async def get_location(request: web.Request):
+        location_id = state["location_id"]
+        await stall()
+        if location_id is None:
+            return web.json_response({"detail": "Not found"}, status=404)
+        return web.json_response(location(location_id))
+
+    async def create_location(request: web.Request):
+        state["location_id"] = (state["location_id"] or 0) + 1
+        return web.json_response(location(state["location_id"]))
+
+    async def search(request: web.Request):
+        communities = list(state["communities"])
+        await stall()
+        return web.json_response(communities)
+
+    async def create_community(request: web.Request):
+        body = await request.json()
+        community = dict(body, id=community_id)
+        state["communities"].append(community)
+        return web.json_response(community)
+
+    app = web.Application()
+    app.add_routes([
+        web.get("/community-location/{community_id}", get_location),
+        web.post("/community-location", create_location),
+        web.get("/community", search),
+        web.post("/community", create_community),
+    ])
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    return server, stall
+
+
+async def community_proxy(server: TestServer):
+    upstream = Upstream(
+        "community",
+        CommunityServiceSettings(COMMUNITY_BASE_URL="127.0.0.1", COMMUNITY_PORT=server.port),
+        UpstreamPoolSettings(),
+        coalesce_gets=True,
+    )
+    await upstream.start()
+    return upstream, ProxyEngine([upstream])
+
+
+def test_get_after_location_write_does_not_join_stale_lookup():
+    async def scenario():
+        community_id = 501
+        server, stall = await community_service(community_id)
+        upstream, proxy = await community_proxy(server)
+        try:
+            get_location = controller.get_community_location_send_request_to_service
+
+            stall.armed = True
+            stale = asyncio.ensure_future(get_location(community_id, USER, proxy))
+            await asyncio.wait_for(stall.received.wait(), 5)
+
+            await controller.community_location_send_request_to_service(USER, proxy)
+            fresh = await asyncio.wait_for(get_location(community_id, USER, proxy), 5)
+            assert fresh.communityId == community_id
+
+            stall.release.set()
+            with pytest.raises(HTTPException) as exc_info:
+                await stale
+            assert exc_info.value.status_code == 404
+
+            # 404 запроса, начатого до записи, не попал в негативный кэш
+            assert ("location", community_id) not in controller.not_found_cache
+            later = await get_location(community_id, USER, proxy)
+            assert later.communityId == community_id
+        finally:
+            await upstream.close()
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+def search(proxy: ProxyEngine, name=None):
+    return controller.search_community_send_request_to_service(
+        USER, proxy, is_owner=False, community_id=None, name=name, description=None,
+    )
+
+
+def found_ids(response) -> list:
+    return [community["id"] for community in json.loads(response.body)]
+
+
+def test_search_after_create_does_not_join_stale_search():
+    async def scenario():
+        community_id = 502
+        server, stall = await community_service(community_id)
+        upstream, proxy = await community_proxy(server)
+        controller.search_cache.clear()
+        try:
+            # Поиск, на результат которого новое сообщество не влияет, остается в кэше
+            assert found_ids(await search(proxy, name="шахматы")) == []
+
+            stall.armed = True
+            stale = asyncio.ensure_future(search(proxy))
+            await asyncio.wait_for(stall.received.wait(), 5)
+
+            created = await controller.create_community_send_request_to_service(
+                USER, CommunityRequestDTO(name="Go club", description="Игры по средам"), proxy,
+            )
+            assert created.id == community_id
+            fresh = await asyncio.wait_for(search(proxy), 5)
+            assert found_ids(fresh) == [community_id]
+
+            stall.release.set()
+            assert found_ids(await stale) == []
+
+            # Ответ поиска, начатого до создания, не попал в кэш
+            assert found_ids(await search(proxy)) == [community_id]
+            assert found_ids(await search(proxy, name="шахматы")) == []
+        finally:
+            controller.search_cache.clear()
+            await upstream.close()
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_location_cache_is_not_filled_by_pre_write_lookup():
+    async def scenario():
+        community_id = 503
+        server, stall = await community_service(community_id, location_id=1)
+        upstream, proxy = await community_proxy(server)
+        try:
+            get_location = controller.get_community_location_send_request_to_service
+
+            stall.armed = True
+            stale = asyncio.ensure_future(get_location(community_id, USER, proxy))
+            await asyncio.wait_for(stall.received.wait(), 5)
+
+            written = await controller.community_location_send_request_to_service(USER, proxy)
+            assert written.locationId == 2
+            fresh = await asyncio.wait_for(get_location(community_id, USER, proxy), 5)
+            assert fresh.locationId == 2
+
+            stall.release.set()
+            assert (await stale).locationId == 1
+            assert (await get_location(community_id, USER, proxy)).locationId == 2
+        finally:
+            await upstream.close()
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("params, affected", [
+    ({}, True),
+    ({"id": 7}, True),
+    ({"id": 8}, False),
+    ({"creatorId": 3}, True),
+    ({"creatorId": 4}, False),
+    ({"name": "CHESS"}, True),
+    ({"name": "go"}, False),
+    ({"description": "каждую"}, True),
+    ({"description": "пятница"}, False),
+    ({"name": "chess", "creatorId": 4}, False),
+    ({"name": "chess", "description": "каждую", "creatorId": 3}, True),
+])
+def test_affected_by_matches_search_filters(params, affected):
+    community = CommunityResponseDTO(id=7, name="Chess club", description="Турнир каждую среду", creator_id=3)
+    assert controller._affected_by(community)(controller._search_key(params)) is affected
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from collections import deque
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.hedging import LatencyWindow
+from core.resilience import RetryBudget
+from core.settings import PersonalAccountServiceSettings, UpstreamPoolSettings
+from core.upstream import Upstream
+
+FAST = 0.01
+STALL = 0.5
+
+
+def test_hedge_delay_is_the_stall_when_tail_reaches_the_percentile():
+    # Хвост реже (100 - p)%: перцентиль — обычная задержка, дубль уйдет вовремя
+    rare = LatencyWindow(min_samples=100)
+    for i in range(100):
+        rare.record(STALL if i % 25 == 0 else FAST)
+    assert rare.percentile(95) == FAST
+
+    # Хвост 10% при p95: перцентиль и есть зависание, дубль уходит слишком поздно
+    frequent = LatencyWindow(min_samples=100)
+    for i in range(100):
+        frequent.record(STALL if i % 10 == 0 else FAST)
+    assert frequent.percentile(95) == STALL
+    assert frequent.percentile(85) == FAST
+
+
+def test_hedge_budget_limits_hedges_to_the_ratio():
+    budget = RetryBudget(ratio=0.05)
+    while budget.withdraw():
+        pass
+
+    granted = 0
+    for _ in range(100):
+        budget.deposit()
+        granted += budget.withdraw()
+    assert granted == 5
+
+
+def test_slow_attempt_is_hedged_after_the_percentile():
+    delays = deque()
+
+    async def get_profile(request: web.Request):
+        await asyncio.sleep(delays.popleft() if delays else FAST)
+        return web.json_response({"id": 1})
+
+    async def scenario():
+        app = web.Application()
+        app.add_routes([web.get("/profile", get_profile)])
+        server = TestServer(app, host="127.0.0.1")
+        await server.start_server()
+        upstream = Upstream(
+            "personal_account",
+            PersonalAccountServiceSettings(PA_BASE_URL="127.0.0.1", PA_PORT=server.port),
+            # Нижняя граница задержки дубля отсекает случайные колебания быстрых ответов
+            UpstreamPoolSettings(UPSTREAM_HEDGE_ENABLED=True, UPSTREAM_HEDGE_PERCENTILE=95,
+                                 UPSTREAM_HEDGE_MIN_DELAY=0.1),
+        )
+        await upstream.start()
+        try:
+            # До min_samples замеров дублей нет
+            for _ in range(50):
+                await upstream.fetch("GET", "/profile", hedge="/profile")
+            assert upstream.hedged == 0
+
+            delays.append(STALL)
+            started = time.perf_counter()
+            response = await upstream.fetch("GET", "/profile", hedge="/profile")
+            elapsed = time.perf_counter() - started
+            assert response.status == 200
+            assert upstream.hedged == 1
+            assert elapsed < STALL / 2
+
+            # Ответ быстрее порога не дублируется
+            await upstream.fetch("GET", "/profile", hedge="/profile")
+            assert upstream.hedged == 1
+        finally:
+            await upstream.close()
+            await server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,30 @@
+import pytest
+
+from core.timing import PHASE_UPSTREAM_BODY, PHASE_UPSTREAM_WAIT, RequestTimings
+
+
+def test_parallel_upstream_calls_are_not_summed():
+    timings = RequestTimings()
+    # Три параллельных запроса к сервисам и один после них
+    timings.add(PHASE_UPSTREAM_WAIT, 0.0, 0.010)
+    timings.add(PHASE_UPSTREAM_WAIT, 0.002, 0.012)
+    timings.add(PHASE_UPSTREAM_WAIT, 0.004, 0.008)
+    timings.add(PHASE_UPSTREAM_WAIT, 0.020, 0.025)
+
+    assert timings.phases[PHASE_UPSTREAM_WAIT] == pytest.approx(0.017)
+
+
+def test_follower_gets_only_the_time_it_waited():
+    shared = RequestTimings()
+    shared.add(PHASE_UPSTREAM_WAIT, 0.0, 0.050)
+    shared.add(PHASE_UPSTREAM_BODY, 0.050, 0.052)
+
+    follower = RequestTimings()
+    follower.merge(shared, since=0.040)
+    assert follower.phases[PHASE_UPSTREAM_WAIT] == pytest.approx(0.010)
+    assert follower.phases[PHASE_UPSTREAM_BODY] == pytest.approx(0.002)
+
+    late = RequestTimings()
+    late.merge(shared, since=0.051)
+    assert PHASE_UPSTREAM_WAIT not in late.phases
+    assert late.phases[PHASE_UPSTREAM_BODY] == pytest.approx(0.001)
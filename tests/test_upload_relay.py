@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+
+from core.multipart import MultipartRelay, UploadBudget
+from core.resilience import STATE_CLOSED
+from core.settings import PersonalAccountServiceSettings, UpstreamPoolSettings
+from core.upstream import Upstream
+
+BOUNDARY = "test-boundary"
+
+
+async def aborted_upload():
+    yield (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"photo\"; filename=\"a.jpg\"\r\n"
+           f"Content-Type: image/jpeg\r\n\r\n").encode() + b"x" * 1024
+    raise ClientDisconnect()
+
+
+async def upload_profile_service():
+    async def patch_profile(request: web.Request):
+        await request.read()
+        return web.json_response({"id": 1})
+
+    async def get_profile(request: web.Request):
+        return web.json_response({"id": 1})
+
+    app = web.Application()
+    app.add_routes([web.patch("/profile", patch_profile), web.get("/profile", get_profile)])
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    return server
+
+
+def test_aborted_upload_is_not_counted_as_upstream_failure():
+    async def scenario():
+        server = await upload_profile_service()
+        upstream = Upstream(
+            "personal_account",
+            PersonalAccountServiceSettings(PA_BASE_URL="127.0.0.1", PA_PORT=server.port,
+                                           PA_BREAKER_FAILURE_THRESHOLD=1),
+            UpstreamPoolSettings(UPSTREAM_EJECT_FAILURES=1),
+        )
+        await upstream.start()
+        limit = upstream.limiter.limit
+        try:
+            for _ in range(3):
+                relay = MultipartRelay(f"multipart/form-data; boundary={BOUNDARY}", fields={"photo": "photo"},
+                                       extra_fields={"userID": "1"}, max_bytes=10 ** 6, budget=UploadBudget(10 ** 7))
+                with pytest.raises(HTTPException) as error:
+                    await upstream.fetch("PATCH", "/profile", data=relay.body(aborted_upload()),
+                                         headers={"Content-Type": relay.content_type})
+                assert error.value.status_code == 400
+
+            assert upstream.breaker.state == STATE_CLOSED
+            assert upstream.breaker.failures == 0
+            assert all(instance.ejected_until == 0 for instance in upstream.balancer.instances)
+            assert upstream.limiter.limit == limit
+            response = await upstream.fetch("GET", "/profile", params={"userID": 1})
+            assert response.status == 200
+        finally:
+            await upstream.close()
+            await server.close()
+
+    asyncio.run(scenario())
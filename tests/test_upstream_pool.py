@@ -0,0 +1,67 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from fastapi import HTTPException
+
+from core.resilience import STATE_CLOSED
+from core.settings import CommunityServiceSettings, UpstreamPoolSettings
+from core.upstream import Upstream
+
+
+async def slow_members_service(delay: float):
+    async def get_members(request: web.Request):
+        await asyncio.sleep(delay)
+        return web.json_response([])
+
+    app = web.Application()
+    app.add_routes([web.get("/community/{community_id}/members", get_members)])
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    return server
+
+
+def community(port: int, **pool) -> Upstream:
+    return Upstream(
+        "community",
+        CommunityServiceSettings(COMMUNITY_BASE_URL="127.0.0.1", COMMUNITY_PORT=port,
+                                 COMMUNITY_CONNECT_TIMEOUT=0.2, COMMUNITY_BREAKER_FAILURE_THRESHOLD=2),
+        UpstreamPoolSettings(UPSTREAM_POOL_LIMIT_PER_HOST=2, **pool),
+    )
+
+
+def test_limiter_never_exceeds_pool():
+    upstream = community(1)
+    assert upstream.limiter.max_limit == 2
+    assert upstream.limiter.limit <= 2
+
+
+def test_waiting_for_pool_is_not_an_upstream_failure():
+    async def fetch(upstream: Upstream, community_id: int):
+        try:
+            return (await upstream.fetch("GET", f"/community/{community_id}/members")).status
+        except HTTPException as error:
+            return error.status_code
+
+    async def scenario(pool_wait_timeout: float):
+        server = await slow_members_service(0.3)
+        upstream = community(server.port, UPSTREAM_ADAPTIVE_CONCURRENCY=False,
+                             UPSTREAM_POOL_WAIT_TIMEOUT=pool_wait_timeout)
+        await upstream.start()
+        try:
+            statuses = await asyncio.gather(*(fetch(upstream, i) for i in range(12)))
+            return statuses, upstream.breaker.state, upstream.breaker.failures
+        finally:
+            await upstream.close()
+            await server.close()
+
+    # Медленный, но исправный сервис за узким пулом: дольше connect-таймаута в очереди — не сбой
+    statuses, state, failures = asyncio.run(scenario(pool_wait_timeout=5.0))
+    assert statuses == [200] * 12
+    assert (state, failures) == (STATE_CLOSED, 0)
+
+    # Очередь дольше pool_wait_timeout: быстрый 503, но цепь остается замкнутой
+    statuses, state, failures = asyncio.run(scenario(pool_wait_timeout=0.1))
+    assert statuses.count(200) == 2
+    assert set(statuses) == {200, 503}
+    assert (state, failures) == (STATE_CLOSED, 0)
@@ -1,3 +1,6 @@
 #!/bin/bash
 
-uvicorn src.api_gateway_app:app --host 0.0.0.0 --port 8000
+# X-Forwarded-For учитывается только от адресов из FORWARDED_ALLOW_IPS (IP или подсети через запятую):
+# за обратным прокси без этого все клиенты видны с адреса прокси и делят один лимит запросов по IP
+uvicorn src.api_gateway_app:app --host 0.0.0.0 --port 8000 \
+    --proxy-headers --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}"